@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import platform
+import statistics
+import tempfile
+import multiprocessing
+from datetime import date
+
+# Benchmarks for PDF and rich text generation on reproducible synthetic weeks.
+#
+#   python benchmarks/bench_reports.py -o before.json
+#   python benchmarks/bench_reports.py -o after.json
+#   python benchmarks/bench_reports.py --compare before.json after.json
+#
+# Each case runs in a fresh process so peak RSS belongs to that case alone.
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = ("serviced repeater tower radio console agency dispatch replaced antenna cable "
+         "programmed portable mobile unit firmware alignment tested inventory Motorola "
+         "Harris site generator battery microwave link trouble ticket fixed verified").split()
+
+RANGES = ('Monday–Friday', 'Thursday–Thursday')
+# Fixed anchor so every run renders the same dated day keys
+ANCHOR = date(2026, 10, 15)
+NOTE_WORDS = {'short': 12, 'medium': 60, 'long': 220}
+SUBFIELDS = {0: [], 2: ["Start", "End"], 5: ["Start", "End", "Agency", "Devices", "Hours"]}
+LOGO_SIZES = {'none': None, 'small': (400, 240), 'large': (3000, 1800)}
+HTML_LOOPS = 200
+
+def make_week(seed, note_length, subfield_count, report_range):
+    from data.reporting_calendar import days_for
+    rng = random.Random(seed)
+    subfields = SUBFIELDS[subfield_count]
+    week_data = {}
+    for day in days_for({'report_range': report_range}, ANCHOR):
+        words = NOTE_WORDS[note_length]
+        general = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(words // 2, words)))
+        week_data[day] = {
+            'general': general,
+            'additional': {sub: str(rng.randint(1000, 99999)) for sub in subfields},
+        }
+    summary = ' '.join(rng.choice(WORDS) for _ in range(NOTE_WORDS[note_length]))
+    settings = {
+        'name': 'Bench Tech', 'agency': 'County Radio Shop', 'location': 'Main Site',
+        'logo': '', 'report_range': report_range,
+        'additional_field': 'Vehicle Mileage' if subfields else '',
+        'additional_subfields': subfields,
+    }
+    return settings, week_data, summary
+
+def make_logo(size, work_dir):
+    if size is None:
+        return ''
+    path = os.path.join(work_dir, f"logo_{size[0]}x{size[1]}.png")
+    if not os.path.exists(path):
+        from PIL import Image
+        Image.effect_noise(size, 64).convert('RGB').save(path)
+    return path
+
+def all_cases(quick=False):
+    cases = []
+    for report_range in RANGES:
+        for note_length in NOTE_WORDS:
+            for subfield_count in SUBFIELDS:
+                for logo in LOGO_SIZES:
+                    if quick and (subfield_count == 5 or logo == 'small' or note_length == 'medium'):
+                        continue
+                    name = f"{report_range.split('–')[0][:3].lower()}-{note_length}-sub{subfield_count}-logo_{logo}"
+                    cases.append({'name': name, 'report_range': report_range, 'note_length': note_length,
+                                  'subfields': subfield_count, 'logo': logo})
+    return cases
+
+def peak_rss_bytes():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            return getattr(info, 'peak_wset', info.rss)
+        except ImportError:
+            return None
+
+def run_case(case, repeat, work_dir):
+    # Runs in a child process
+    from reports import logo_cache, pdf_cache
+    from reports.pdf_generator import generate_pdf_report
+    from reports.rich_text import build_rich_text_html
+    logo_cache.cache_dir = os.path.join(work_dir, 'logo_cache')
+    pdf_cache.enabled = False
+    settings, week_data, summary = make_week(zlib.crc32(case['name'].encode('utf-8')), case['note_length'], case['subfields'], case['report_range'])
+    settings['logo'] = make_logo(LOGO_SIZES[case['logo']], work_dir)
+    pdf_path = os.path.join(work_dir, case['name'] + '.pdf')
+    from data.reporting_calendar import range_for
+    args = (settings, week_data, summary, case['report_range'], *range_for(settings, ANCHOR))
+
+    pdf_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generate_pdf_report(pdf_path, *args)
+        pdf_times.append(time.perf_counter() - start)
+    # The HTML builder is fast enough that single calls are mostly timer noise
+    html_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(HTML_LOOPS):
+            html = build_rich_text_html(*args)
+        html_times.append((time.perf_counter() - start) / HTML_LOOPS)
+    return dict(case,
+                pdf_first_s=pdf_times[0],
+                pdf_min_s=min(pdf_times),
+                pdf_median_s=statistics.median(pdf_times),
+                pdf_bytes=os.path.getsize(pdf_path),
+                html_min_s=min(html_times),
+                html_median_s=statistics.median(html_times),
+                html_bytes=len(html.encode('utf-8')),
+                peak_rss_bytes=peak_rss_bytes())
+
+def run_suite(cases, repeat, out=sys.stdout):
+    results = []
+    ctx = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory(prefix='wrapup-bench-') as work_dir:
+        for case in cases:
+            with ctx.Pool(1) as pool:
+                result = pool.apply(run_case, (case, repeat, work_dir))
+            results.append(result)
+            rss = result['peak_rss_bytes']
+            print(f"{case['name']:<36} pdf {result['pdf_median_s'] * 1000:8.1f} ms "
+                  f"(first {result['pdf_first_s'] * 1000:7.1f}) {result['pdf_bytes'] / 1024:8.1f} KiB  "
+                  f"html {result['html_median_s'] * 1e6:8.1f} us  "
+                  f"rss {rss / 2**20 if rss else float('nan'):6.1f} MiB", file=out)
+    return {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+def compare(base_path, new_path, threshold, out=sys.stdout):
+    with open(base_path, 'r', encoding='utf-8') as f:
+        base = {r['name']: r for r in json.load(f)['results']}
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = {r['name']: r for r in json.load(f)['results']}
+    # Best-of-N times are compared; they are far less noisy than medians
+    metrics = ('pdf_min_s', 'pdf_bytes', 'html_min_s', 'peak_rss_bytes')
+    regressions = 0
+    print(f"{'case':<36}" + ''.join(f"{m:>18}" for m in metrics), file=out)
+    for name in sorted(base.keys() & new.keys()):
+        cells = []
+        for metric in metrics:
+            before, after = base[name].get(metric), new[name].get(metric)
+            if not before or after is None:
+                cells.append(f"{'n/a':>18}")
+                continue
+            change = (after - before) / before * 100
+            flag = '!' if change > threshold else ' '
+            regressions += change > threshold
+            cells.append(f"{change:+16.1f}%{flag}")
+        print(f"{name:<36}" + ''.join(cells), file=out)
+    missing = sorted(base.keys() ^ new.keys())
+    if missing:
+        print(f"\nCases only in one run: {', '.join(missing)}", file=out)
+    print(f"\n{regressions} metric(s) regressed by more than {threshold:g}%", file=out)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PDF and rich text report generation.")
+    parser.add_argument('-o', '--output', help="Write results as JSON to this file")
+    parser.add_argument('-n', '--repeat', type=int, default=5, help="Renders per case (default: 5)")
+    parser.add_argument('-k', '--filter', default='', help="Only run cases whose name contains this text")
+    parser.add_argument('--quick', action='store_true', help="Run a reduced case matrix")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help="Compare two result files instead of running")
+    parser.add_argument('--threshold', type=float, default=10.0, help="Percent increase counted as a regression (default: 10)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare, args.threshold) else 0
+    cases = [c for c in all_cases(args.quick) if args.filter in c['name']]
+    report = run_suite(cases, args.repeat)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+
+# Startup profile for the desktop app:
+#   python benchmarks/startup_profile.py            # source checkout
+#   python benchmarks/startup_profile.py --exe dist/WrapUp.exe
+#
+# Summarizes `python -X importtime` for `import main` (slowest modules by
+# cumulative import time) and times launching the app until its first
+# event loop pass after showing the window.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+# Modules that should not be imported before the window is shown
+DEFERRED = ('reportlab', 'PIL', 'reports.pdf_generator', 'reports.rich_text', 'sqlite3')
+
+def import_profile(runs):
+    cumulative = defaultdict(list)
+    own = defaultdict(list)
+    totals = []
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                                cwd=ROOT, env=env, capture_output=True, text=True)
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if not match:
+                continue
+            self_us, cumulative_us, indent, module = match.groups()
+            own[module].append(int(self_us))
+            cumulative[module].append(int(cumulative_us))
+            if module == 'main':
+                totals.append(int(cumulative_us))
+    return ({m: statistics.median(v) for m, v in cumulative.items()},
+            {m: statistics.median(v) for m, v in own.items()},
+            statistics.median(totals) if totals else None)
+
+def launch_times(runs, exe=None):
+    wall, reported = [], []
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    command = [exe, '--startup-time'] if exe else [sys.executable, 'main.py', '--startup-time']
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+        wall.append(time.perf_counter() - start)
+        match = re.search(r"startup: ([\d.]+) ms", result.stdout)
+        if match:
+            reported.append(float(match.group(1)))
+    return wall, reported
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile WrapUp startup time.")
+    parser.add_argument('-n', '--runs', type=int, default=5, help="Runs per measurement (default: 5)")
+    parser.add_argument('--top', type=int, default=15, help="Modules to list (default: 15)")
+    parser.add_argument('--exe', help="Also time a frozen build, e.g. dist/WrapUp.exe")
+    args = parser.parse_args(argv)
+
+    cumulative, own, total = import_profile(args.runs)
+    print(f"import main: {total / 1000:.1f} ms (median of {args.runs})\n" if total else "import main: failed\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for module, value in sorted(cumulative.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{value / 1000:14.1f} {own[module] / 1000:9.1f}  {module}")
+    early = sorted(m for m in cumulative if m.split('.')[0] in DEFERRED or m in DEFERRED)
+    print("\nDeferred modules imported at startup: " + (', '.join(early) if early else "none"))
+
+    wall, reported = launch_times(args.runs)
+    print(f"\npython main.py: {statistics.median(wall) * 1000:.0f} ms wall"
+          + (f", window ready {statistics.median(reported):.0f} ms after main.py started" if reported else ""))
+    if args.exe:
+        wall, _ = launch_times(args.runs, args.exe)
+        print(f"{args.exe}: {statistics.median(wall) * 1000:.0f} ms wall")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
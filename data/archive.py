@@ -0,0 +1,292 @@
+import os
+import sys
+import json
+import zlib
+import struct
+import argparse
+import tempfile
+import threading
+from bisect import bisect_right
+
+# Compact archive of past weeks. Each week is an independently compressed
+# record; a compressed offset index at the end of the file maps
+# (date_start, date_end) to its record. Opening an archive reads only the
+# fixed header and the index, and a week is decompressed only when asked for.
+#
+#   header  magic, version, index offset, index length, week count
+#   records zlib(week JSON), one per week, in any order
+#   index   zlib(JSON [[date_start, date_end, offset, length, crc32], ...])
+#
+# Appending writes new records and a new index after the old ones and only
+# then rewrites the header, so an interrupted append leaves the previous
+# archive readable. Replaced weeks leave dead records until `pack` rewrites
+# the file.
+#
+#   python -m data.archive pack --before 2026-01-01 [--move]
+#   python -m data.archive list
+#   python -m data.archive show 2025-03-12
+#   python -m data.archive restore --from 2025-01-01 --to 2025-06-30
+
+archive_file = os.path.join(os.path.expanduser("~"), ".weekly_report_archive.wrarc")
+
+MAGIC = b'WRAR'
+VERSION = 1
+_header = struct.Struct('<4sHxxQII')
+compress_level = 6
+
+class ArchiveError(ValueError):
+    pass
+
+def _encode(week):
+    return zlib.compress(json.dumps(week, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), compress_level)
+
+class WeekArchive:
+    def __init__(self, path=None):
+        self.path = path or archive_file
+        self._lock = threading.Lock()
+        self._index = []
+        self._starts = []
+        self._positions = {}
+        self._file = None
+        self._stat = None
+        self._index_length = 0
+        if os.path.exists(self.path):
+            self._file = open(self.path, 'rb')
+            self._read_index()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __len__(self):
+        return len(self._index)
+
+    def _read_index(self):
+        header = self._file.read(_header.size)
+        if len(header) != _header.size:
+            raise ArchiveError(f"{self.path}: truncated header")
+        magic, version, index_offset, index_length, count = _header.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ArchiveError(f"{self.path}: not a version {VERSION} week archive")
+        try:
+            self._file.seek(index_offset)
+            index = json.loads(zlib.decompress(self._file.read(index_length)).decode('utf-8')) if index_length else []
+            index = [tuple(entry) for entry in index]
+        except (OSError, OverflowError, ValueError, TypeError, zlib.error) as e:
+            raise ArchiveError(f"{self.path}: damaged index ({e})") from None
+        if len(index) != count or any(len(entry) != 5 for entry in index):
+            raise ArchiveError(f"{self.path}: damaged index")
+        self._set_index(index)
+        self._end = index_offset + index_length
+        self._index_length = index_length
+        self._stat = _file_stat(self.path)
+
+    def _set_index(self, index):
+        self._index = sorted(index)
+        self._starts = [entry[0] for entry in self._index]
+        self._positions = {(entry[0], entry[1]): i for i, entry in enumerate(self._index)}
+
+    def list_weeks(self):
+        return [(date_start, date_end) for date_start, date_end, *_ in self._index]
+
+    def __contains__(self, key):
+        return tuple(key) in self._positions
+
+    def _decode(self, entry):
+        date_start, date_end, offset, length, crc = entry
+        with self._lock:
+            self._file.seek(offset)
+            record = self._file.read(length)
+        if zlib.crc32(record) != crc:
+            raise ArchiveError(f"{self.path}: week {date_start} to {date_end} is damaged")
+        return json.loads(zlib.decompress(record).decode('utf-8'))
+
+    def load_week(self, date_start, date_end=None):
+        # Same lookup rules as HistoryStore.load_week: an exact range, or any
+        # date inside a week
+        if date_end is not None:
+            i = self._positions.get((date_start, date_end))
+            return None if i is None else self._decode(self._index[i])
+        i = bisect_right(self._starts, date_start) - 1
+        while i >= 0:
+            entry = self._index[i]
+            if entry[1] >= date_start:
+                return self._decode(entry)
+            i -= 1
+        return None
+
+    def iter_weeks(self, date_from=None, date_to=None):
+        # One week decoded at a time, oldest first
+        date_from, date_to = date_from or '', date_to or '9999-12-31'
+        for entry in self._index[:bisect_right(self._starts, date_to)]:
+            if entry[1] >= date_from:
+                yield self._decode(entry)
+
+    def add_weeks(self, weeks):
+        # Appends weeks (replacing any stored under the same range); returns
+        # the number added
+        records = []
+        for week in weeks:
+            date_range = week.get('date_range')
+            if not date_range or len(date_range) != 2:
+                continue
+            records.append((str(date_range[0]), str(date_range[1]), _encode(week)))
+        if not records:
+            return 0
+        with self._lock:
+            if self._file is None:
+                _write_new(self.path, records)
+                self._file = open(self.path, 'rb')
+            else:
+                self._append(records)
+            self._file.seek(0)
+            self._read_index()
+        return len(records)
+
+    def _append(self, records):
+        index = {(entry[0], entry[1]): entry for entry in self._index}
+        with open(self.path, 'r+b') as f:
+            f.seek(self._end)
+            for date_start, date_end, record in records:
+                index[(date_start, date_end)] = (date_start, date_end, f.tell(), len(record), zlib.crc32(record))
+                f.write(record)
+            index_offset = f.tell()
+            index_blob = zlib.compress(json.dumps(sorted(index.values())).encode('utf-8'))
+            f.write(index_blob)
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(0)
+            f.write(_header.pack(MAGIC, VERSION, index_offset, len(index_blob), len(index)))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def stale(self):
+        # True when another process has rewritten or replaced the file since
+        # this archive read its index
+        return _file_stat(self.path) != self._stat
+
+    def pack(self):
+        # Rewrites the archive without dead records, through a temp file
+        with self._lock:
+            if self._file is None:
+                return
+            records = []
+            for date_start, date_end, offset, length, crc in self._index:
+                self._file.seek(offset)
+                records.append((date_start, date_end, self._file.read(length)))
+            self._file.close()
+            _write_new(self.path, records)
+            self._file = open(self.path, 'rb')
+            self._read_index()
+
+    def dead_bytes(self):
+        live = _header.size + self._index_length + sum(entry[3] for entry in self._index)
+        return max(0, os.path.getsize(self.path) - live) if self._file is not None else 0
+
+def _file_stat(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def _write_new(path, records):
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='.weekly_report_', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'\0' * _header.size)
+            index = {}
+            for date_start, date_end, record in records:
+                index[(date_start, date_end)] = (date_start, date_end, f.tell(), len(record), zlib.crc32(record))
+                f.write(record)
+            index_offset = f.tell()
+            index_blob = zlib.compress(json.dumps(sorted(index.values())).encode('utf-8'))
+            f.write(index_blob)
+            f.seek(0)
+            f.write(_header.pack(MAGIC, VERSION, index_offset, len(index_blob), len(index)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+_archive = None
+_archive_lock = threading.Lock()
+
+def get_archive():
+    # The default archive, or None when nothing has been archived yet.
+    # Reopened when `python -m data.archive` has changed it in the meantime.
+    global _archive
+    with _archive_lock:
+        if _archive is not None and _archive.stale():
+            _archive.close()
+            _archive = None
+        if _archive is None and os.path.exists(archive_file):
+            _archive = WeekArchive()
+        return _archive
+
+def open_archive():
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = WeekArchive()
+        return _archive
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m data.archive', description="Keep past weeks in a compact compressed archive.")
+    parser.add_argument('--file', help=f"Archive file (default: {archive_file})")
+    commands = parser.add_subparsers(dest='command', required=True)
+    pack = commands.add_parser('pack', help="Copy weeks from the history store into the archive")
+    pack.add_argument('--from', dest='date_from', help="First date to include (YYYY-MM-DD)")
+    pack.add_argument('--before', help="Only weeks that end before this date (YYYY-MM-DD)")
+    pack.add_argument('--move', action='store_true', help="Remove the archived weeks from the history store")
+    commands.add_parser('list', help="List archived weeks")
+    show = commands.add_parser('show', help="Print one archived week as JSON")
+    show.add_argument('date', help="Any date inside the week (YYYY-MM-DD)")
+    restore = commands.add_parser('restore', help="Copy archived weeks back into the history store")
+    restore.add_argument('--from', dest='date_from')
+    restore.add_argument('--to', dest='date_to')
+    args = parser.parse_args(argv)
+
+    from data.history import get_history
+    archive = WeekArchive(args.file) if args.file else open_archive()
+    if args.command == 'pack':
+        history = get_history()
+        weeks = [week for week in history.iter_weeks(args.date_from)
+                 if not args.before or week['date_range'][1] < args.before]
+        added = archive.add_weeks(weeks)
+        if args.move:
+            for week in weeks:
+                history.delete_week(*week['date_range'])
+        if archive.dead_bytes() > os.path.getsize(archive.path) // 2:
+            archive.pack()
+        print(f"{added} week(s) archived in {archive.path} ({os.path.getsize(archive.path):,} bytes, {len(archive)} week(s))")
+    elif args.command == 'list':
+        for date_start, date_end in archive.list_weeks():
+            print(f"{date_start} – {date_end}")
+        print(f"\n{len(archive)} week(s)")
+    elif args.command == 'show':
+        week = archive.load_week(args.date)
+        if week is None:
+            print(f"No archived week contains {args.date}", file=sys.stderr)
+            return 1
+        json.dump(week, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    elif args.command == 'restore':
+        history = get_history()
+        count = 0
+        for week in archive.iter_weeks(args.date_from, args.date_to):
+            history.record_week(week)
+            count += 1
+        print(f"{count} week(s) restored to the history store")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import os
+import sys
+import csv
+import json
+import argparse
+import numpy as np
+from data.reporting_calendar import WEEKDAYS
+
+# Columnar export of the subfield values of every saved week. The history is
+# read in one query and flattened into parallel NumPy arrays, one entry per
+# (day, subfield) cell; aggregates are computed with grouped array operations
+# instead of a Python loop per cell.
+#
+#   python -m data.export -o export/
+#   python -m data.export -o export/ --from 2025-01-01 --start Start --end End
+
+def _parse_numbers(text):
+    # Float value of each cell, NaN where the text is not a number. Plain
+    # decimals are converted in one astype; anything else (exponents, words)
+    # is tried once per distinct string.
+    cleaned = np.char.replace(np.char.strip(text), ',', '')
+    unsigned = np.char.lstrip(cleaned, '+-')
+    digits = np.char.replace(unsigned, '.', '', 1)
+    plain = np.char.isdecimal(digits) & (np.char.str_len(cleaned) - np.char.str_len(unsigned) <= 1)
+    values = np.full(len(cleaned), np.nan)
+    values[plain] = cleaned[plain].astype(np.float64)
+    others, inverse = np.unique(cleaned[~plain], return_inverse=True)
+    parsed = np.full(len(others), np.nan)
+    for i, cell in enumerate(others.tolist()):
+        try:
+            parsed[i] = float(cell)
+        except ValueError:
+            pass
+    values[~plain] = parsed[inverse.reshape(-1)]
+    return values
+
+def _day_dates(keys, week_starts):
+    # Dated keys ("Monday 2026-10-12") carry their date. Bare weekday keys from
+    # older saves are placed in the week that starts on week_starts.
+    suffix = np.char.rpartition(keys, ' ')[:, 2]
+    dated = np.char.str_len(suffix) == 10
+    dates = np.empty(len(keys), dtype='datetime64[D]')
+    dates[dated] = suffix[dated].astype('datetime64[D]')
+    if not dated.all():
+        legacy = ~dated
+        starts = week_starts[legacy].astype('datetime64[D]')
+        lookup = {name: i for i, name in enumerate(WEEKDAYS)}
+        weekday = np.array([lookup.get(k, 0) for k in keys[legacy]])
+        # 1970-01-01 was a Thursday (weekday 3)
+        start_weekday = (starts.astype(np.int64) + 3) % 7
+        dates[legacy] = starts + ((weekday - start_weekday) % 7).astype('timedelta64[D]')
+    return dates
+
+def build_table(rows):
+    # rows: (date_start, date_end, day, additional_json, settings_json) tuples.
+    # Returns a dict of equal-length arrays: week_start, week_end, date, day,
+    # agency, subfield, text and value (float, NaN when not numeric).
+    week_starts, week_ends, days, agencies, subfields, texts = [], [], [], [], [], []
+    agency_of = {}
+    for date_start, date_end, day, additional, settings in rows:
+        cells = json.loads(additional or '{}')
+        if not cells:
+            continue
+        if settings not in agency_of:
+            agency_of[settings] = json.loads(settings or '{}').get('agency', '')
+        n = len(cells)
+        week_starts += [date_start] * n
+        week_ends += [date_end] * n
+        days += [day] * n
+        agencies += [agency_of[settings]] * n
+        subfields.extend(cells.keys())
+        texts.extend(str(v) for v in cells.values())
+    table = {
+        'week_start': np.array(week_starts, dtype=str),
+        'week_end': np.array(week_ends, dtype=str),
+        'day': np.array(days, dtype=str),
+        'agency': np.array(agencies, dtype=str),
+        'subfield': np.array(subfields, dtype=str),
+        'text': np.array(texts, dtype=str),
+    }
+    table['value'] = _parse_numbers(table['text']) if texts else np.array([], dtype=np.float64)
+    table['date'] = _day_dates(table['day'], table['week_start']) if texts else np.array([], dtype='datetime64[D]')
+    return table
+
+def weekly_totals(table):
+    # Sum and count of the numeric values of each subfield per week
+    numeric = ~np.isnan(table['value'])
+    keys = np.stack([table['week_start'][numeric], table['week_end'][numeric], table['subfield'][numeric]], axis=1)
+    groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    return {
+        'week_start': groups[:, 0],
+        'week_end': groups[:, 1],
+        'subfield': groups[:, 2],
+        'total': np.bincount(inverse, weights=table['value'][numeric], minlength=len(groups)),
+        'count': np.bincount(inverse, minlength=len(groups)),
+    }
+
+def deltas(table, start_field='Start', end_field='End'):
+    # end_field - start_field for every day that has both (e.g. mileage driven)
+    cell_day = np.char.add(np.char.add(table['week_start'], '|'), table['day'])
+    days, first, inverse = np.unique(cell_day, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    start = np.full(len(days), np.nan)
+    end = np.full(len(days), np.nan)
+    is_start = table['subfield'] == start_field
+    is_end = table['subfield'] == end_field
+    start[inverse[is_start]] = table['value'][is_start]
+    end[inverse[is_end]] = table['value'][is_end]
+    both = ~(np.isnan(start) | np.isnan(end))
+    # First cell of each day gives its date, day name and week
+    first = first[both]
+    return {
+        'week_start': table['week_start'][first],
+        'date': table['date'][first],
+        'day': table['day'][first],
+        'start': start[both],
+        'end': end[both],
+        'delta': end[both] - start[both],
+    }
+
+def agency_counts(table, field=None):
+    # Days reported per agency. With `field`, agencies are the text values of
+    # that subfield; otherwise the agency from each week's settings.
+    if field:
+        mask = table['subfield'] == field
+        agency = np.char.strip(table['text'][mask])
+        day = np.char.add(np.char.add(table['week_start'][mask], '|'), table['day'][mask])
+    else:
+        agency = table['agency']
+        day = np.char.add(np.char.add(table['week_start'], '|'), table['day'])
+    if not len(agency):
+        return {'agency': agency, 'days': np.array([], dtype=np.int64)}
+    pairs = np.unique(np.stack([agency, day], axis=1), axis=0)
+    names, counts = np.unique(pairs[:, 0], return_counts=True)
+    order = np.argsort(-counts, kind='stable')
+    return {'agency': names[order], 'days': counts[order]}
+
+def load_table(date_from=None, date_to=None):
+    from data.storage import export_rows
+    return build_table(export_rows(date_from, date_to))
+
+def write_csv(path, columns):
+    names = list(columns)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        # NaN (non-numeric cells) is written as an empty field
+        writer.writerows(zip(*(np.where(np.isnan(col), '', col).tolist() if col.dtype.kind == 'f' else col.tolist()
+                               for col in (columns[name] for name in names))))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export every saved subfield value as a table, with weekly totals, deltas and per-agency counts.")
+    parser.add_argument('-o', '--output', default='.', help="Directory for the CSV files (default: current directory)")
+    parser.add_argument('--from', dest='date_from', help="Include whole weeks that end on or after this date (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='date_to', help="Include whole weeks that start on or before this date (YYYY-MM-DD)")
+    parser.add_argument('--start', default='Start', help="Subfield holding start readings (default: Start)")
+    parser.add_argument('--end', default='End', help="Subfield holding end readings (default: End)")
+    parser.add_argument('--agency-field', help="Count agencies from this subfield instead of the report settings")
+    args = parser.parse_args(argv)
+
+    table = load_table(args.date_from, args.date_to)
+    os.makedirs(args.output, exist_ok=True)
+    outputs = {
+        'records.csv': {name: table[name] for name in ('date', 'day', 'week_start', 'week_end', 'agency', 'subfield', 'text', 'value')},
+        'weekly_totals.csv': weekly_totals(table),
+        'deltas.csv': deltas(table, args.start, args.end),
+        'agency_counts.csv': agency_counts(table, args.agency_field),
+    }
+    for name, columns in outputs.items():
+        write_csv(os.path.join(args.output, name), columns)
+        print(f"{name:<20} {len(next(iter(columns.values()))):8d} rows")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
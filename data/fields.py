@@ -0,0 +1,202 @@
+import re
+from collections import namedtuple
+
+# Typed subfields and computed columns. Subfield values are parsed once, when
+# a week is saved, and stored in native form: int and float as numbers, time
+# as minutes after midnight and duration as minutes. Text that does not parse
+# is kept as typed so nothing is lost.
+#
+# Settings keys:
+#   subfield_types    {'Start': 'int', 'Arrived': 'time', ...}; missing = text
+#   computed_columns  [{'name': 'Miles', 'expr': 'End - Start'}, ...]
+#   total_columns     ['Miles', ...]; columns summed in a weekly totals row
+
+field_types = ('text', 'int', 'float', 'time', 'duration')
+summable_types = ('int', 'float', 'duration')
+
+Column = namedtuple('Column', 'name type expr')
+
+_duration_units = re.compile(r"^\s*(?:(\d+(?:\.\d+)?)\s*h(?:rs?|ours?)?)?\s*(?:(\d+(?:\.\d+)?)\s*m(?:in(?:ute)?s?)?)?\s*$", re.I)
+_clock = re.compile(r"^\s*(\d{1,2})(?::?(\d{2}))?\s*([ap]\.?m\.?)?\s*$", re.I)
+_operator = re.compile(r"\s+([-+*/])\s+")
+
+def _number(text):
+    return float(text.replace(',', '').strip())
+
+def parse_value(field_type, text):
+    # Native value for `text`, or the text itself when it does not parse
+    if not isinstance(text, str):
+        return text
+    if field_type == 'text' or not text.strip():
+        return text
+    try:
+        if field_type == 'int':
+            value = _number(text)
+            return int(value) if value.is_integer() else value
+        if field_type == 'float':
+            return _number(text)
+        if field_type == 'time':
+            match = _clock.match(text)
+            hours, minutes, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+            if meridiem:
+                hours = hours % 12 + (12 if meridiem[0].lower() == 'p' else 0)
+            if hours > 23 or minutes > 59:
+                return text
+            return hours * 60 + minutes
+        if field_type == 'duration':
+            # The sign applies to the whole value: "-1:30" is -90 minutes
+            body = text.strip()
+            sign = -1 if body.startswith('-') else 1
+            body = body.lstrip('+-')
+            if ':' in body:
+                hours, minutes = body.split(':')
+                return sign * (int(hours or 0) * 60 + int(minutes))
+            match = _duration_units.match(body)
+            if match and (match.group(1) or match.group(2)):
+                return sign * round(float(match.group(1) or 0) * 60 + float(match.group(2) or 0))
+            # A bare number is hours
+            return sign * round(_number(body) * 60)
+    except (AttributeError, ValueError):
+        return text
+    return text
+
+def format_value(field_type, value, editing=False):
+    # Display text for a native value. Reports round floats to two places;
+    # with editing=True floats keep full precision, so text put back into
+    # an editor parses to the same value when it is saved again.
+    if value is None or isinstance(value, str):
+        return value or ''
+    if field_type in ('time', 'duration'):
+        value = int(round(value))
+    if field_type == 'time':
+        return f"{value // 60:02d}:{value % 60:02d}"
+    if field_type == 'duration':
+        sign = '-' if value < 0 else ''
+        return f"{sign}{abs(value) // 60}:{abs(value) % 60:02d}"
+    if isinstance(value, float):
+        if editing:
+            text = repr(value)
+            return text[:-2] if text.endswith('.0') else text
+        return f"{value:,.2f}".rstrip('0').rstrip('.')
+    return f"{value:,}" if field_type in ('int', 'float') else str(value)
+
+def field_type(settings, subfield):
+    field_type = settings.get('subfield_types', {}).get(subfield, 'text')
+    return field_type if field_type in field_types else 'text'
+
+def compile_expression(expr):
+    # "End - Start" -> [('+', 'End'), ('-', 'Start')]. Operators need spaces
+    # around them (subfield names may contain '-'); evaluated left to right.
+    parts = _operator.split(' ' + expr.strip())
+    terms = [('+', parts[0].strip())]
+    for op, operand in zip(parts[1::2], parts[2::2]):
+        terms.append((op, operand.strip()))
+    return tuple(terms)
+
+def computed_type(types, expr):
+    # types: column name -> type of the columns to the left of this one
+    types = {types.get(name, 'text') for _, name in compile_expression(expr)}
+    if types & {'time', 'duration'}:
+        return 'duration'
+    if 'float' in types or any(op == '/' for op, _ in compile_expression(expr)):
+        return 'float'
+    return 'int'
+
+def report_columns(settings, subfields=None):
+    # Columns of the report table after Day and General Notes, as a hashable tuple
+    if subfields is None:
+        subfields = settings.get('additional_subfields', [])
+    columns = [Column(sub, field_type(settings, sub), None) for sub in subfields]
+    types = {column.name: column.type for column in columns}
+    for computed in settings.get('computed_columns', []):
+        if computed.get('name') and computed.get('expr'):
+            column = Column(computed['name'], computed_type(types, computed['expr']), compile_expression(computed['expr']))
+            types[column.name] = column.type
+            columns.append(column)
+    return tuple(columns)
+
+def total_columns(settings, columns):
+    # Names of the columns summed in the totals row, in table order
+    wanted = set(settings.get('total_columns', []))
+    return tuple(column.name for column in columns if column.name in wanted and column.type in summable_types)
+
+def _operand(name, values):
+    if name in values:
+        value = values[name]
+        return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+    try:
+        return _number(name)
+    except ValueError:
+        return None
+
+def evaluate(expr_terms, values):
+    result = 0
+    for op, name in expr_terms:
+        value = _operand(name, values)
+        if value is None:
+            return None
+        if op == '+':
+            result += value
+        elif op == '-':
+            result -= value
+        elif op == '*':
+            result *= value
+        elif value:
+            result /= value
+        else:
+            return None
+    return result
+
+def week_table(week_data, columns, totals_for=()):
+    # Per-day native values for `columns`, and the totals row (None for
+    # columns not in `totals_for`). Computed once per week for every output.
+    rows = []
+    for daydata in week_data.values():
+        additional = daydata.get('additional', {})
+        values = {}
+        for column in columns:
+            if column.expr is None:
+                values[column.name] = parse_value(column.type, additional.get(column.name, ''))
+            else:
+                values[column.name] = evaluate(column.expr, values)
+        rows.append([values[column.name] for column in columns])
+    totals = []
+    for i, column in enumerate(columns):
+        if column.name not in totals_for:
+            totals.append(None)
+            continue
+        numbers = [row[i] for row in rows if isinstance(row[i], (int, float))]
+        totals.append(sum(numbers) if numbers else None)
+    return rows, totals
+
+def format_row(columns, values):
+    return [format_value(column.type, value) for column, value in zip(columns, values)]
+
+def parse_subfield_spec(text):
+    # "Start:int, End:int, Notes" -> (['Start', 'End', 'Notes'], {'Start': 'int', 'End': 'int'})
+    subfields, types = [], {}
+    for item in text.split(','):
+        name, _, kind = item.strip().rpartition(':')
+        if not name or kind.strip().lower() not in field_types:
+            name, kind = item.strip(), 'text'
+        name, kind = name.strip(), kind.strip().lower()
+        if name:
+            subfields.append(name)
+            if kind != 'text':
+                types[name] = kind
+    return subfields, types
+
+def format_subfield_spec(subfields, types):
+    return ', '.join(f"{sub}:{types[sub]}" if types.get(sub, 'text') != 'text' else sub for sub in subfields)
+
+def parse_computed_spec(text):
+    # "Miles = End - Start; Time = Left - Arrived"
+    computed = []
+    for item in text.split(';'):
+        name, _, expr = item.partition('=')
+        if name.strip() and expr.strip():
+            computed.append({'name': name.strip(), 'expr': expr.strip()})
+    return computed
+
+def format_computed_spec(computed):
+    return '; '.join(f"{c['name']} = {c['expr']}" for c in computed)
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from data.storage import get_week_data
+from data import search as search_index
+
+history_file = os.path.join(os.path.expanduser("~"), ".weekly_report_history.db")
+
+# Every saved week is kept, keyed by the (start, end) date_range recorded by
+# MainWindow.save_all_data. Days are stored as their own rows so a save only
+# touches the days that actually changed.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weeks (
+    date_start TEXT NOT NULL,
+    date_end TEXT NOT NULL,
+    report_range TEXT NOT NULL DEFAULT '',
+    summary TEXT NOT NULL DEFAULT '',
+    settings TEXT NOT NULL DEFAULT '{}',
+    updated REAL NOT NULL,
+    PRIMARY KEY (date_start, date_end)
+);
+CREATE TABLE IF NOT EXISTS days (
+    date_start TEXT NOT NULL,
+    date_end TEXT NOT NULL,
+    day TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    general TEXT NOT NULL DEFAULT '',
+    additional TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (date_start, date_end, day)
+);
+CREATE INDEX IF NOT EXISTS weeks_by_end ON weeks (date_end);
+"""
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+class HistoryStore:
+    def __init__(self, path=None):
+        self.path = path or history_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.executescript(search_index.SCHEMA)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != search_index.index_version:
+            with self._conn:
+                search_index.rebuild_index(self._conn)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record_week(self, data):
+        # Returns the number of day rows written (0 when nothing changed).
+        date_range = data.get('date_range')
+        if not date_range or len(date_range) != 2:
+            return 0
+        date_start, date_end = date_range
+        week_data = get_week_data(data)
+        header = (data.get('report_range', ''), data.get('summary', ''), _dumps(data.get('settings', {})))
+        with self._lock, self._conn:
+            stored_header = self._conn.execute(
+                "SELECT report_range, summary, settings FROM weeks WHERE date_start=? AND date_end=?",
+                (date_start, date_end)).fetchone()
+            stored_days = {
+                day: (position, general, additional)
+                for day, position, general, additional in self._conn.execute(
+                    "SELECT day, position, general, additional FROM days WHERE date_start=? AND date_end=?",
+                    (date_start, date_end))
+            }
+            changed = []
+            for position, (day, daydata) in enumerate(week_data.items()):
+                row = (position, daydata.get('general', ''), _dumps(daydata.get('additional', {})))
+                if stored_days.get(day) != row:
+                    changed.append((date_start, date_end, day) + row)
+            if changed:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO days (date_start, date_end, day, position, general, additional) VALUES (?, ?, ?, ?, ?, ?)",
+                    changed)
+            removed = [(date_start, date_end, day) for day in stored_days if day not in week_data]
+            if removed:
+                self._conn.executemany("DELETE FROM days WHERE date_start=? AND date_end=? AND day=?", removed)
+            # Keep the search index in step with the rows just written
+            for _, _, day, _, general, additional in changed:
+                search_index.index_document(self._conn, date_start, date_end, day, search_index.day_text(general, additional))
+            for _, _, day in removed:
+                search_index.remove_document(self._conn, date_start, date_end, day)
+            if stored_header is None or stored_header[1] != header[1]:
+                search_index.index_document(self._conn, date_start, date_end, search_index.SUMMARY, header[1])
+            if changed or removed or stored_header != header:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO weeks (date_start, date_end, report_range, summary, settings, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                    (date_start, date_end) + header + (time.time(),))
+        return len(changed)
+
+    def load_week(self, date_start, date_end=None):
+        # Returns the week in the same shape save_data writes, or None.
+        with self._lock:
+            if date_end is None:
+                row = self._conn.execute(
+                    "SELECT date_start, date_end, report_range, summary, settings FROM weeks "
+                    "WHERE date_start <= ? AND date_end >= ? ORDER BY date_start DESC LIMIT 1",
+                    (date_start, date_start)).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT date_start, date_end, report_range, summary, settings FROM weeks WHERE date_start=? AND date_end=?",
+                    (date_start, date_end)).fetchone()
+            if row is None:
+                return None
+            days = self._conn.execute(
+                "SELECT day, general, additional FROM days WHERE date_start=? AND date_end=? ORDER BY position",
+                (row[0], row[1])).fetchall()
+        return self._build_week(row, days)
+
+    def list_weeks(self):
+        with self._lock:
+            return [tuple(r) for r in self._conn.execute("SELECT date_start, date_end FROM weeks ORDER BY date_start")]
+
+    def iter_weeks(self, date_from=None, date_to=None):
+        # Yields one week at a time, oldest first, so callers never hold all history.
+        with self._lock:
+            keys = self._conn.execute(
+                "SELECT date_start, date_end FROM weeks WHERE date_end >= ? AND date_start <= ? ORDER BY date_start",
+                (date_from or '', date_to or '9999-12-31')).fetchall()
+        for date_start, date_end in keys:
+            week = self.load_week(date_start, date_end)
+            if week is not None:
+                yield week
+
+    def export_rows(self, date_from=None, date_to=None):
+        # (date_start, date_end, day, additional, settings) for every stored day,
+        # in date order, with additional and settings as their JSON text
+        with self._lock:
+            return self._conn.execute(
+                "SELECT d.date_start, d.date_end, d.day, d.additional, w.settings FROM days d "
+                "JOIN weeks w USING (date_start, date_end) WHERE d.date_end >= ? AND d.date_start <= ? "
+                "ORDER BY d.date_start, d.position",
+                (date_from or '', date_to or '9999-12-31')).fetchall()
+
+    def delete_week(self, date_start, date_end):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM days WHERE date_start=? AND date_end=?", (date_start, date_end))
+            self._conn.execute("DELETE FROM weeks WHERE date_start=? AND date_end=?", (date_start, date_end))
+            search_index.remove_document(self._conn, date_start, date_end)
+
+    def search(self, query, limit=20):
+        # Ranked hits over every saved day and summary; see data.search
+        with self._lock:
+            return search_index.search(self._conn, query, limit)
+
+    @staticmethod
+    def _build_week(row, days):
+        date_start, date_end, report_range, summary, settings = row
+        week = {}
+        for day, general, additional in days:
+            week[day] = {'general': general, 'additional': json.loads(additional)}
+        week['summary'] = summary
+        week['settings'] = json.loads(settings)
+        week['report_range'] = report_range
+        week['date_range'] = [date_start, date_end]
+        return week
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_history():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+        return _store
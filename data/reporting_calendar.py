@@ -0,0 +1,87 @@
+from datetime import date, timedelta
+from functools import lru_cache
+
+# Reporting periods and their day keys, shared by the window, storage and
+# the report generators. Day keys carry the date ("Thursday 2026-10-15"), so
+# ranges that include the same weekday twice no longer collide.
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+DEFAULT_RANGE = 'Monday–Friday'
+DEFAULT_WEEKEND = (5, 6)
+
+# name -> (kind, first weekday, length in calendar days)
+report_ranges = {
+    'Monday–Friday': ('weekly', 0, 5),
+    'Thursday–Thursday': ('weekly', 3, 8),
+    'Two Weeks': ('fortnight', 0, 12),
+    'Month': ('month', None, None),
+}
+
+# Two-week periods start on Mondays an even number of weeks after this date
+fortnight_epoch = date(2024, 1, 1)
+
+def register_range(name, first_weekday, length_days, every_other_week=False):
+    report_ranges[name] = ('fortnight' if every_other_week else 'weekly', first_weekday, length_days)
+    period_for.cache_clear()
+
+def day_key(day):
+    return f"{WEEKDAYS[day.weekday()]} {day.isoformat()}"
+
+def weekday_of(key):
+    return key.split(' ', 1)[0]
+
+@lru_cache(maxsize=256)
+def period_for(report_range, today):
+    kind, first_weekday, length = report_ranges.get(report_range, report_ranges[DEFAULT_RANGE])
+    if kind == 'month':
+        start = today.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return start, end
+    start = today - timedelta(days=(today.weekday() - first_weekday) % 7)
+    if kind == 'fortnight' and ((start - fortnight_epoch).days // 7) % 2:
+        start -= timedelta(days=7)
+    return start, start + timedelta(days=length - 1)
+
+@lru_cache(maxsize=256)
+def date_table(start, end, holidays=(), weekend=DEFAULT_WEEKEND):
+    # Working days between start and end (inclusive) as (key, date) pairs
+    table = []
+    day = start
+    while day <= end:
+        if day.weekday() not in weekend and day.isoformat() not in holidays:
+            table.append((day_key(day), day))
+        day += timedelta(days=1)
+    return tuple(table)
+
+def _rules(settings):
+    holidays = tuple(sorted(settings.get('holidays', [])))
+    weekend = () if settings.get('include_weekends') else DEFAULT_WEEKEND
+    return holidays, weekend
+
+def days_for(settings, today=None):
+    start, end = period_for(settings.get('report_range', DEFAULT_RANGE), today or date.today())
+    return [key for key, _ in date_table(start, end, *_rules(settings))]
+
+def range_for(settings, today=None):
+    start, end = period_for(settings.get('report_range', DEFAULT_RANGE), today or date.today())
+    return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+def days_between(settings, date_start, date_end):
+    # Day keys of a saved period, e.g. one recorded in a save's date_range
+    start, end = date.fromisoformat(str(date_start)), date.fromisoformat(str(date_end))
+    return [key for key, _ in date_table(start, end, *_rules(settings))]
+
+def upgrade_day_keys(data, day_keys):
+    # Data saved before dated keys used bare weekday names ("Monday"); map them
+    # onto the dated keys of the current period. Those saves kept only the last
+    # panel of a repeated weekday, so it goes to the last matching day.
+    upgraded = dict(data)
+    seen = set()
+    for key in reversed(day_keys):
+        weekday = weekday_of(key)
+        if weekday in seen:
+            continue
+        seen.add(weekday)
+        if key not in upgraded and isinstance(data.get(weekday), dict):
+            upgraded[key] = data[weekday]
+    return upgraded
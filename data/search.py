@@ -0,0 +1,183 @@
+import re
+import sys
+import math
+import json
+import time
+import argparse
+
+# Inverted index over the history database. Every day of every saved week, and
+# each week's summary, is one searchable document; postings are updated in the
+# same transaction as the rows they describe, so the index never needs a full
+# rebuild after the first one.
+#
+#   python -m data.search "repeater harris"
+#   python -m data.search "moto*" --limit 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    date_start TEXT NOT NULL,
+    date_end TEXT NOT NULL,
+    location TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (date_start, date_end, location)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS search_postings (
+    term TEXT NOT NULL,
+    date_start TEXT NOT NULL,
+    date_end TEXT NOT NULL,
+    location TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (term, date_start, date_end, location)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_doc ON search_postings (date_start, date_end, location);
+"""
+
+# Bumped when tokenizing changes; HistoryStore rebuilds the index on mismatch
+index_version = 1
+
+SUMMARY = 'summary'
+k1 = 1.2
+b = 0.75
+_token = re.compile(r"\w+")
+
+def tokenize(text):
+    return _token.findall(text.casefold())
+
+def day_text(general, additional):
+    # additional: dict of subfield values, or its JSON text as stored in `days`
+    if isinstance(additional, str):
+        additional = json.loads(additional or '{}')
+    return ' '.join([general] + [str(value) for value in additional.values()])
+
+def index_document(conn, date_start, date_end, location, text):
+    # Replaces the postings of one document; call inside the caller's transaction
+    remove_document(conn, date_start, date_end, location)
+    terms = {}
+    for term in tokenize(text):
+        terms[term] = terms.get(term, 0) + 1
+    if not terms:
+        return
+    conn.execute("INSERT INTO search_docs (date_start, date_end, location, length) VALUES (?, ?, ?, ?)",
+                 (date_start, date_end, location, sum(terms.values())))
+    conn.executemany(
+        "INSERT INTO search_postings (term, date_start, date_end, location, count) VALUES (?, ?, ?, ?, ?)",
+        [(term, date_start, date_end, location, count) for term, count in terms.items()])
+
+def remove_document(conn, date_start, date_end, location=None):
+    # Without a location, every document of the week is removed
+    where = "date_start=? AND date_end=?"
+    params = (date_start, date_end)
+    if location is not None:
+        where += " AND location=?"
+        params += (location,)
+    conn.execute(f"DELETE FROM search_postings WHERE {where}", params)
+    conn.execute(f"DELETE FROM search_docs WHERE {where}", params)
+
+def rebuild_index(conn):
+    conn.execute("DELETE FROM search_postings")
+    conn.execute("DELETE FROM search_docs")
+    for date_start, date_end, summary in conn.execute("SELECT date_start, date_end, summary FROM weeks").fetchall():
+        index_document(conn, date_start, date_end, SUMMARY, summary)
+    for date_start, date_end, day, general, additional in conn.execute(
+            "SELECT date_start, date_end, day, general, additional FROM days").fetchall():
+        index_document(conn, date_start, date_end, day, day_text(general, additional))
+    conn.execute(f"PRAGMA user_version={index_version}")
+
+_posting_columns = ("SELECT p.date_start, p.date_end, p.location, p.count, d.length FROM search_postings p "
+                    "JOIN search_docs d USING (date_start, date_end, location) ")
+
+def _postings(conn, term):
+    # A trailing '*' matches every term with that prefix
+    if term.endswith('*') and len(term) > 1:
+        prefix = term[:-1]
+        return conn.execute(_posting_columns + "WHERE p.term >= ? AND p.term < ?",
+                            (prefix, prefix + '\U0010ffff')).fetchall()
+    return conn.execute(_posting_columns + "WHERE p.term=?", (term.rstrip('*'),)).fetchall()
+
+def parse_query(query):
+    return list(dict.fromkeys(re.findall(r"\w+\*?", query.casefold())))
+
+def search(conn, query, limit=20):
+    # Ranks documents with BM25; documents matching more of the query terms
+    # rank above those matching fewer. Returns the best `limit` hits as dicts
+    # with date_start, date_end, location, score, matched and text.
+    terms = parse_query(query)
+    doc_count, total_length = conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM search_docs").fetchone()
+    if not terms or not doc_count:
+        return []
+    average_length = total_length / doc_count
+    scores = {}
+    matched = {}
+    for term in terms:
+        postings = _postings(conn, term)
+        df = len({posting[:3] for posting in postings})
+        idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+        for date_start, date_end, location, count, length in postings:
+            doc = (date_start, date_end, location)
+            norm = k1 * (1 - b + b * length / average_length)
+            scores[doc] = scores.get(doc, 0.0) + idf * count * (k1 + 1) / (count + norm)
+            matched.setdefault(doc, set()).add(term)
+    ranked = sorted(scores, key=lambda doc: (-len(matched[doc]), -scores[doc], doc[0]))[:limit]
+    hits = []
+    for doc in ranked:
+        date_start, date_end, location = doc
+        if location == SUMMARY:
+            row = conn.execute("SELECT summary FROM weeks WHERE date_start=? AND date_end=?", (date_start, date_end)).fetchone()
+            text = row[0] if row else ''
+        else:
+            row = conn.execute("SELECT general, additional FROM days WHERE date_start=? AND date_end=? AND day=?", doc).fetchone()
+            text = day_text(*row) if row else ''
+        hits.append({
+            'date_start': date_start,
+            'date_end': date_end,
+            'location': location,
+            'score': round(scores[doc], 4),
+            'matched': sorted(matched[doc]),
+            'text': text,
+        })
+    return hits
+
+def match_spans(text, terms):
+    # (start, end) of every word in `text` that one of the matched query
+    # terms stands for, tokenized the way the index is
+    exact = {term.rstrip('*') for term in terms if not (term.endswith('*') and len(term) > 1)}
+    prefixes = tuple(term[:-1] for term in terms if term.endswith('*') and len(term) > 1)
+    spans = []
+    for match in _token.finditer(text):
+        word = match.group().casefold()
+        if word in exact or word.startswith(prefixes):
+            spans.append(match.span())
+    return spans
+
+def snippet(text, terms, width=120):
+    # A window of `text` around the first matching term
+    folded = text.casefold()
+    positions = [folded.find(t.rstrip('*')) for t in terms]
+    positions = [p for p in positions if p >= 0]
+    start = max(0, min(positions) - width // 3) if positions else 0
+    piece = ' '.join(text[start:start + width].split())
+    return ('…' if start else '') + piece + ('…' if start + width < len(text) else '')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search every saved week's notes, summaries and subfields.")
+    parser.add_argument('query', help="Words to search for; end a word with * to match a prefix")
+    parser.add_argument('-n', '--limit', type=int, default=20, help="Maximum hits to show (default: 20)")
+    parser.add_argument('--json', action='store_true', help="Print hits as JSON")
+    args = parser.parse_args(argv)
+
+    from data.storage import search_history
+    start = time.perf_counter()
+    hits = search_history(args.query, args.limit)
+    elapsed = time.perf_counter() - start
+    if args.json:
+        json.dump(hits, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0 if hits else 1
+    for hit in hits:
+        where = 'Summary' if hit['location'] == SUMMARY else hit['location']
+        print(f"{hit['date_start']} – {hit['date_end']}  {where:<24} {hit['score']:7.2f}  {snippet(hit['text'], hit['matched'])}")
+    print(f"\n{len(hits)} hit(s) in {elapsed * 1000:.1f} ms")
+    return 0 if hits else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,275 @@
 import os
+import sys
 import json
+import heapq
+import atexit
+import tempfile
+import threading
 
 data_file = os.path.join(os.path.expanduser("~"), ".weekly_report_data.json")
 
+# Top-level keys written by MainWindow.save_all_data that are not day entries
+report_keys = ('summary', 'settings', 'report_range', 'date_range')
+
+# Parsed copy of data_file, valid while the file's (mtime, size) is unchanged,
+# or while a newer save is still queued for the writer thread ('pending').
+# load_data hands out shallow copies; nested dicts must be treated as read-only.
+_cache = {'key': None, 'data': None, 'pending': False, 'generation': 0}
+_cache_stats = {'hits': 0, 'misses': 0}
+_lock = threading.Condition()
+
+# Write-behind state: only the newest queued save is kept, so bursts of saves
+# coalesce into a single disk write. 'error' is the exception from the last
+# write while the newest save has not reached disk; a later successful write
+# clears it.
+_writer = {'thread': None, 'queued': None, 'busy': False, 'error': None}
+# Called on the writer thread with a message for each failed save, history
+# update or sync queueing; see set_error_handler
+_error_handler = [None]
+
+def set_error_handler(handler):
+    # handler(message) runs on the writer thread; a GUI must hand the message
+    # to its own thread (e.g. through a queued signal). None reports to stderr.
+    _error_handler[0] = handler
+
+def _report(message):
+    handler = _error_handler[0]
+    if handler is None:
+        print(f"WrapUp: {message}", file=sys.stderr)
+        return
+    try:
+        handler(message)
+    except Exception as e:
+        print(f"WrapUp: {message} (error handler failed: {e})", file=sys.stderr)
+
+def _file_key():
+    try:
+        st = os.stat(data_file)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _atomic_write(path, payload):
+    # temp file + fsync + rename: readers see either the old or the new file, never a partial one
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='.weekly_report_', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def _writer_loop():
+    from data.history import get_history
+    while True:
+        with _lock:
+            while _writer['queued'] is None:
+                _lock.wait()
+            payload, data, generation = _writer['queued']
+            _writer['queued'] = None
+            _writer['busy'] = True
+        error = None
+        try:
+            _atomic_write(data_file, payload)
+        except Exception as e:
+            error = e
+            _report(f"saving {data_file} failed: {e}")
+        if error is None:
+            # The save itself succeeded; history and sync problems are
+            # reported on their own and do not fail it
+            try:
+                # Keep every week in the history store; only changed days are written
+                get_history().record_week(data)
+            except Exception as e:
+                _report(f"recording the week in history failed: {e}")
+            try:
+                # Queue the week for upload when a team server is configured
+                from data import sync
+                sync.notify_saved(data)
+            except Exception as e:
+                _report(f"queueing the week for sync failed: {e}")
+        with _lock:
+            _writer['busy'] = False
+            if error is not None:
+                # The snapshot never reached disk: keep it marked pending so
+                # load_data does not pass it off as the file's contents
+                _writer['error'] = error
+            else:
+                _writer['error'] = None
+                if _cache['generation'] == generation and _writer['queued'] is None:
+                    _cache['key'] = _file_key()
+                    _cache['pending'] = False
+            _lock.notify_all()
+
 def save_data(data):
-    with open(data_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Serialize on the caller's thread so later edits to `data` cannot leak into
+    # the write; the disk work happens on the background writer thread.
+    payload = json.dumps(data, ensure_ascii=False, indent=2)
+    snapshot = json.loads(payload)
+    with _lock:
+        _cache['generation'] += 1
+        _cache['data'] = snapshot
+        _cache['pending'] = True
+        _writer['queued'] = (payload, snapshot, _cache['generation'])
+        if _writer['thread'] is None:
+            _writer['thread'] = threading.Thread(target=_writer_loop, name='wrapup-writer', daemon=True)
+            _writer['thread'].start()
+        _lock.notify_all()
+
+def update_data(changes):
+    # Merge a partial update into the current document and queue it for writing.
+    # Day entries are merged field by field ('general' and individual 'additional'
+    # subfields); report-level keys are replaced. An update for a new period
+    # starts a fresh document; the previous one is already in the history.
+    data = load_data()
+    if 'date_range' in changes and data.get('date_range') and list(data['date_range']) != list(changes['date_range']):
+        data = {key: data[key] for key in ('settings',) if key in data}
+    for key, value in changes.items():
+        if key in report_keys or not isinstance(value, dict):
+            data[key] = value
+            continue
+        day = dict(data.get(key) or {'general': '', 'additional': {}})
+        if 'general' in value:
+            day['general'] = value['general']
+        if 'additional' in value:
+            day['additional'] = {**day.get('additional', {}), **value['additional']}
+        data[key] = day
+    save_data(data)
+
+def flush(timeout=None):
+    # Block until queued saves have been written (or have failed); False on
+    # timeout. Failures go to the error handler, not to whoever flushes next;
+    # check save_error() when it matters that the data reached disk.
+    with _lock:
+        return _lock.wait_for(lambda: _writer['queued'] is None and not _writer['busy'], timeout)
+
+def save_error():
+    # The exception that kept the newest save from reaching disk, or None
+    # once it (or a later save) has been written
+    with _lock:
+        return _writer['error']
 
 def load_data():
-    if os.path.exists(data_file):
-        with open(data_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+    with _lock:
+        if _cache['pending']:
+            _cache_stats['hits'] += 1
+            return dict(_cache['data'])
+        key = _file_key()
+        if key is None:
+            return {}
+        if _cache['key'] == key:
+            _cache_stats['hits'] += 1
+            return dict(_cache['data'])
+        _cache_stats['misses'] += 1
+        try:
+            with open(data_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except ValueError:
+            # A file truncated by an older, non-atomic save: set it aside instead of crashing
+            os.replace(data_file, data_file + '.corrupt')
+            return {}
+        _cache['key'] = key
+        _cache['data'] = data
+        return dict(data)
 
 def clear_data():
-    if os.path.exists(data_file):
-        os.remove(data_file)
+    # Only the current week is cleared; past weeks stay in the history store
+    flush()
+    with _lock:
+        _cache['generation'] += 1
+        _cache['key'] = None
+        _cache['data'] = None
+        _cache['pending'] = False
+        _writer['error'] = None
+        if os.path.exists(data_file):
+            os.remove(data_file)
+
+def cache_stats():
+    with _lock:
+        return dict(_cache_stats)
+
+def get_week_data(data):
+    return {day: daydata for day, daydata in data.items() if day not in report_keys and isinstance(daydata, dict)}
+
+# Weeks moved out of the history store with `python -m data.archive pack
+# --move` are still found here; they are decompressed only when read.
+
+def load_week(date_start, date_end=None):
+    # Look up a past week by its exact range, or by any date inside it
+    from data.history import get_history
+    from data.archive import get_archive
+    flush()
+    week = get_history().load_week(date_start, date_end)
+    archive = get_archive()
+    if week is None and archive is not None:
+        week = archive.load_week(date_start, date_end)
+    return week
+
+def iter_weeks(date_from=None, date_to=None):
+    from data.history import get_history
+    from data.archive import get_archive
+    flush()
+    weeks = get_history().iter_weeks(date_from, date_to)
+    archive = get_archive()
+    if archive is None or not len(archive):
+        return weeks
+    stored = set(get_history().list_weeks())
+    archived = (week for week in archive.iter_weeks(date_from, date_to) if tuple(week['date_range']) not in stored)
+    return heapq.merge(weeks, archived, key=lambda week: tuple(week['date_range']))
+
+def list_weeks():
+    from data.history import get_history
+    from data.archive import get_archive
+    flush()
+    weeks = get_history().list_weeks()
+    archive = get_archive()
+    if archive is not None:
+        weeks = sorted(set(weeks).union(archive.list_weeks()))
+    return weeks
+
+def export_rows(date_from=None, date_to=None):
+    # (date_start, date_end, day, additional JSON, settings JSON) per stored
+    # day, archived weeks included, in date order
+    from data.history import get_history
+    from data.archive import get_archive
+    flush()
+    rows = get_history().export_rows(date_from, date_to)
+    archive = get_archive()
+    if archive is None or not len(archive):
+        return rows
+    stored = set(get_history().list_weeks())
+    archived = (week for week in archive.iter_weeks(date_from, date_to) if tuple(week['date_range']) not in stored)
+    return heapq.merge(rows, _week_rows(archived), key=lambda row: row[0])
+
+def _week_rows(weeks):
+    # Export rows for whole weeks, shaped like HistoryStore.export_rows
+    for week in weeks:
+        date_start, date_end = week['date_range']
+        settings = json.dumps(week.get('settings', {}), ensure_ascii=False, sort_keys=True)
+        for day, daydata in get_week_data(week).items():
+            additional = json.dumps(daydata.get('additional', {}), ensure_ascii=False, sort_keys=True)
+            yield date_start, date_end, day, additional, settings
+
+def search_history(query, limit=20):
+    # Ranked matches across every saved week; see data.search
+    from data.history import get_history
+    flush()
+    return get_history().search(query, limit)
+
+def _flush_at_exit():
+    flush()
+
+atexit.register(_flush_at_exit)
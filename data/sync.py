@@ -0,0 +1,427 @@
+import os
+import ssl
+import sys
+import gzip
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import argparse
+import tempfile
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+
+# Background upload of saved weeks to a team server (server.app). Every save
+# is queued in a local outbox, so nothing is lost while offline. An asyncio
+# loop on its own thread uploads the queue in gzip-compressed batches that
+# carry only the days and fields changed since the server last acknowledged
+# the week, retrying with exponential backoff while the server is unreachable.
+#
+#   python -m data.sync --url http://127.0.0.1:8765 --once     push the queue now
+#   python -m data.sync --status
+
+sync_file = os.path.join(os.path.expanduser("~"), ".weekly_report_sync.db")
+config_file = os.path.join(os.path.expanduser("~"), ".weekly_report_sync.json")
+
+# Settings keys from before the server address and token moved to config_file
+secret_keys = ('sync_url', 'sync_token')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    date_start TEXT NOT NULL,
+    date_end TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (date_start, date_end)
+);
+CREATE TABLE IF NOT EXISTS acked (
+    date_start TEXT NOT NULL,
+    date_end TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (date_start, date_end)
+);
+"""
+
+batch_size = 50
+min_backoff = 1.0
+max_backoff = 300.0
+header_keys = ('summary', 'settings', 'report_range')
+
+class Outbox:
+    # Queued week documents (latest save per week wins) and the last version
+    # the server acknowledged for each week, which deltas are computed against
+    def __init__(self, path=None):
+        self.path = path or sync_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def put(self, data):
+        date_range = data.get('date_range')
+        if not date_range or len(date_range) != 2:
+            return False
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO outbox (date_start, date_end, version, payload) VALUES (?, ?, ?, ?)",
+                (date_range[0], date_range[1], time.time_ns(), json.dumps(data, ensure_ascii=False)))
+        return True
+
+    def pending(self, limit=None):
+        # [(date_start, date_end, version, data)], oldest week first
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date_start, date_end, version, payload FROM outbox ORDER BY date_start LIMIT ?",
+                (limit or -1,)).fetchall()
+        return [(s, e, v, json.loads(p)) for s, e, v, p in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def acked(self, date_start, date_end):
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM acked WHERE date_start=? AND date_end=?", (date_start, date_end)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def mark_sent(self, date_start, date_end, version, data):
+        # The server has `data`; drop it from the outbox unless a newer save
+        # of the week was queued while it was uploading
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO acked (date_start, date_end, payload) VALUES (?, ?, ?)",
+                               (date_start, date_end, json.dumps(data, ensure_ascii=False)))
+            self._conn.execute("DELETE FROM outbox WHERE date_start=? AND date_end=? AND version=?", (date_start, date_end, version))
+
+    def forget_acked(self, date_start, date_end):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM acked WHERE date_start=? AND date_end=?", (date_start, date_end))
+
+    def drop(self, date_start, date_end, version):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM outbox WHERE date_start=? AND date_end=? AND version=?", (date_start, date_end, version))
+
+def _without_secrets(data):
+    settings = data.get('settings')
+    if isinstance(settings, dict) and any(key in settings for key in secret_keys):
+        data = dict(data, settings={key: value for key, value in settings.items() if key not in secret_keys})
+    return data
+
+def week_delta(data, acked):
+    # What the server needs to turn `acked` (None if it has nothing) into
+    # `data`: changed days, and within days only changed fields. Returns None
+    # when nothing changed.
+    from data.storage import get_week_data
+    data = _without_secrets(data)
+    acked = acked if acked is None else _without_secrets(acked)
+    days = get_week_data(data)
+    delta = {'date_range': list(data['date_range']), 'order': list(days)}
+    if acked is None:
+        delta['full'] = True
+        delta['days'] = days
+        delta.update((key, data[key]) for key in header_keys if key in data)
+        return delta
+    old_days = get_week_data(acked)
+    changed = {}
+    for day, daydata in days.items():
+        old = old_days.get(day)
+        if old is None:
+            changed[day] = daydata
+            continue
+        fields = {}
+        if daydata.get('general', '') != old.get('general', ''):
+            fields['general'] = daydata.get('general', '')
+        old_additional = old.get('additional', {})
+        additional = daydata.get('additional', {})
+        if any(sub not in additional for sub in old_additional):
+            # A subfield was dropped; send the day's subfields whole
+            fields['additional'] = additional
+            fields['replace'] = True
+        else:
+            additional = {sub: value for sub, value in additional.items() if old_additional.get(sub) != value}
+            if additional:
+                fields['additional'] = additional
+        if fields:
+            changed[day] = fields
+    removed = [day for day in old_days if day not in days]
+    header = {key: data.get(key) for key in header_keys if data.get(key) != acked.get(key)}
+    if not changed and not removed and not header and list(old_days) == list(days):
+        return None
+    delta['days'] = changed
+    if removed:
+        delta['removed'] = removed
+    delta.update(header)
+    return delta
+
+async def post_json(url, path, value, token=None, timeout=30):
+    # Minimal HTTP/1.1 POST of gzip-compressed JSON on asyncio streams;
+    # returns (status, parsed JSON body or None)
+    parts = urlsplit(url)
+    secure = parts.scheme == 'https'
+    port = parts.port or (443 if secure else 80)
+    body = gzip.compress(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, port, ssl=ssl.create_default_context() if secure else None), timeout)
+    try:
+        head = [f"POST {parts.path.rstrip('/')}{path} HTTP/1.1", f"Host: {parts.netloc}",
+                "Content-Type: application/json", "Content-Encoding: gzip",
+                f"Content-Length: {len(body)}", "Connection: close"]
+        if token:
+            head.append(f"Authorization: Bearer {token}")
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        if not status_line:
+            raise ConnectionError("server closed the connection without replying")
+        fields = status_line.split()
+        if len(fields) < 2 or not fields[0].startswith(b'HTTP/') or not fields[1].isdigit():
+            raise ValueError(f"malformed response from server: {status_line[:80]!r}")
+        status = int(fields[1])
+        length = None
+        while True:
+            line = await asyncio.wait_for(reader.readline(), timeout)
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value_text = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value_text.strip())
+        payload = await asyncio.wait_for(reader.readexactly(length) if length is not None else reader.read(), timeout)
+    finally:
+        writer.close()
+    try:
+        return status, json.loads(payload.decode('utf-8')) if payload else None
+    except ValueError:
+        return status, None
+
+class SyncClient:
+    def __init__(self, url, token=None, outbox=None):
+        self.url = url
+        self.token = token
+        self.outbox = outbox or Outbox()
+        self.last_error = None
+        self.last_sync = None
+        # Messages for the window's status bar, newest last; read with notices()
+        self._notices = deque(maxlen=20)
+        self._thread = None
+        self._loop = None
+        self._wake = None
+        self._stopping = False
+
+    def enqueue(self, data):
+        # Safe from any thread; never waits on the network
+        if self.outbox.put(data):
+            self.wake()
+
+    def wake(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake.set)
+
+    def notices(self):
+        # Pops the messages collected since the last call
+        messages = []
+        while self._notices:
+            messages.append(self._notices.popleft())
+        return messages
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=asyncio.run, args=(self._run(),), name="wrapup-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopping = True
+        self.wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._thread = None
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    async def _run(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        backoff = 0.0
+        while not self._stopping:
+            try:
+                await self.push()
+                if self.last_error is not None:
+                    self._notices.append("Sync: connected again")
+                self.last_error = None
+                backoff = 0.0
+                timeout = None
+            except Exception as e:
+                # Network errors, bad replies and anything unexpected all back
+                # off and retry; the thread must outlive them or the outbox
+                # is never sent
+                if self.last_error is None:
+                    self._notices.append(f"Sync: server unreachable, {self.outbox.count()} week(s) queued ({e})")
+                self.last_error = f"{type(e).__name__}: {e}"
+                # Exponential backoff with jitter while offline or failing
+                backoff = min(max_backoff, max(min_backoff, backoff * 2))
+                timeout = backoff * random.uniform(0.5, 1.0)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+        self._loop = None
+
+    async def push(self):
+        # Uploads everything queued, batch by batch; returns weeks accepted.
+        # Network errors and 5xx responses raise so the caller backs off.
+        sent = 0
+        while True:
+            pending = self.outbox.pending(batch_size)
+            if not pending:
+                return sent
+            # Weeks are filed under the name in their own settings
+            groups = {}
+            for date_start, date_end, version, data in pending:
+                delta = week_delta(data, self.outbox.acked(date_start, date_end))
+                if delta is None:
+                    self.outbox.drop(date_start, date_end, version)
+                    continue
+                member = str(data.get('settings', {}).get('name', '')).strip()
+                groups.setdefault(member, []).append(((date_start, date_end, version, data), delta))
+            for member, items in groups.items():
+                sent += await self._send(member, items)
+
+    async def _send(self, member, items):
+        status, reply = await post_json(self.url, '/api/sync', {'member': member, 'weeks': [delta for _, delta in items]}, self.token)
+        if status >= 500 or status in (401, 403, 408, 429):
+            raise RuntimeError(f"server answered {status}")
+        if status != 200 or not isinstance(reply, dict):
+            if len(items) > 1:
+                # Find the week the server objects to; the others still go
+                sent = 0
+                for item in items:
+                    sent += await self._send(member, [item])
+                return sent
+            (date_start, date_end, version, _), _ = items[0]
+            # It would be rejected again; the week stays in the history store
+            self._reject(date_start, date_end, version, f"{status}: {reply}")
+            return 0
+        results = reply.get('results', [])
+        sent = 0
+        for i, ((date_start, date_end, version, data), _) in enumerate(items):
+            result = results[i] if i < len(results) else {}
+            if result.get('status') == 'ok':
+                self.outbox.mark_sent(date_start, date_end, version, data)
+                sent += 1
+            elif result.get('status') == 'missing':
+                # The server lost its copy; the next round sends the whole week
+                self.outbox.forget_acked(date_start, date_end)
+            else:
+                self._reject(date_start, date_end, version, result)
+        self.last_sync = time.time()
+        return sent
+
+    def _reject(self, date_start, date_end, version, why):
+        self.outbox.drop(date_start, date_end, version)
+        self._notices.append(f"Sync: the server did not accept {date_start} to {date_end} ({why})")
+
+def load_config():
+    # {'url': ..., 'token': ...}; kept out of the report settings so the token
+    # is never saved with, or uploaded in, a week
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return {'url': '', 'token': ''}
+    return {'url': str(config.get('url') or ''), 'token': str(config.get('token') or '')}
+
+def save_config(url, token):
+    directory = os.path.dirname(config_file) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='.weekly_report_', suffix='.tmp', dir=directory)
+    try:
+        # Owner-only: the file holds the server token
+        os.chmod(tmp_path, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'url': url or '', 'token': token or ''}, f)
+        os.replace(tmp_path, config_file)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+_client = None
+_client_lock = threading.Lock()
+_handover_lock = threading.Lock()
+
+def configure(url, token=None):
+    # Starts, restarts or (with no url) stops the background client. Never
+    # waits: a previous client is stopped on a helper thread, and its
+    # replacement starts only once it has exited, so one client at a time
+    # drains the outbox.
+    global _client
+    with _client_lock:
+        old = _client
+        if old is not None and (old.url, old.token) == (url, token or None):
+            return old
+        _client = SyncClient(url, token or None, old.outbox if old is not None else None) if url else None
+        new = _client
+    if old is None:
+        if new is not None:
+            new.start()
+        return new
+
+    def hand_over():
+        # Hand-overs run one at a time, so a quick second reconfigure still
+        # waits for the first old client to finish
+        with _handover_lock:
+            old.stop(timeout=None)
+            with _client_lock:
+                if new is not None and _client is new:
+                    new.start()
+    threading.Thread(target=hand_over, name="wrapup-sync-restart", daemon=True).start()
+    return new
+
+def notices():
+    client = _client
+    return client.notices() if client is not None else []
+
+def notify_saved(data):
+    # Called by data.storage after each save reaches disk
+    client = _client
+    if client is not None:
+        client.enqueue(data)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m data.sync', description="Upload queued weeks to a team server.")
+    parser.add_argument('--url', help="Team server URL, e.g. http://127.0.0.1:8765")
+    parser.add_argument('--token', help="Bearer token for the server")
+    parser.add_argument('--once', action='store_true', help="Push the queue once and exit")
+    parser.add_argument('--status', action='store_true', help="Show how many weeks are waiting to upload")
+    args = parser.parse_args(argv)
+
+    outbox = Outbox()
+    if args.status or not args.once:
+        print(f"{outbox.count()} week(s) waiting to upload")
+        return 0
+    config = load_config()
+    url, token = args.url or config['url'], args.token or config['token']
+    if not url:
+        parser.error("--once needs --url (or a server set in the app's Settings)")
+    client = SyncClient(url, token or None, outbox)
+    try:
+        sent = asyncio.run(client.push())
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, RuntimeError) as e:
+        print(f"Upload failed: {e}; {outbox.count()} week(s) still queued", file=sys.stderr)
+        return 1
+    for notice in client.notices():
+        print(notice, file=sys.stderr)
+    print(f"{sent} week(s) uploaded, {outbox.count()} still queued")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,22 @@
+import time
+_start_time = time.perf_counter()
+import os
 import sys
+import html
 import json
-from datetime import datetime, timedelta
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QLineEdit, QTextEdit, QDialog, QFileDialog, QMessageBox, QFormLayout, QGroupBox, QScrollArea, QTextEdit, QDialogButtonBox, QTextBrowser, QSplitter
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QLineEdit, QTextEdit, QDialog, QFileDialog, QMessageBox, QFormLayout, QGroupBox, QScrollArea, QTextEdit, QDialogButtonBox, QTextBrowser, QSplitter, QCheckBox, QTreeWidget, QTreeWidgetItem
 )
 from PySide6.QtGui import QIcon, QAction
-from PySide6.QtCore import Qt
-from data.storage import save_data, load_data, clear_data
-from reports.pdf_generator import generate_pdf_report
+from PySide6.QtCore import Qt, QTimer, Signal
+from data.storage import save_data, load_data, clear_data, flush, update_data, save_error, set_error_handler
+from data.fields import format_computed_spec, format_subfield_spec, parse_computed_spec, parse_subfield_spec
+from data.reporting_calendar import WEEKDAYS, days_between, days_for, range_for, report_ranges, upgrade_day_keys
+from reports.logo_cache import get_logo
+from ui.day_list import DayListModel, DayListView
+from ui.export_jobs import ExportJobsPanel
+# reports.pdf_generator (ReportLab) and reports.rich_text are imported on
+# first use so the window can show before they load
 
 class SettingsDialog(QDialog):
     def __init__(self, parent=None):
@@ -32,16 +41,49 @@ class SettingsDialog(QDialog):
         layout.addRow("Logo:", logo_layout)
         # Reporting range selection
         self.range_combo = QComboBox()
-        self.range_combo.addItems(["Monday–Friday", "Thursday–Thursday"])
+        self.range_combo.addItems(list(report_ranges))
         layout.addRow("Reporting Range:", self.range_combo)
+        self.holidays_input = QLineEdit()
+        self.holidays_input.setPlaceholderText("Comma separated dates, e.g. 2026-11-26, 2026-12-25")
+        layout.addRow("Holidays (skipped):", self.holidays_input)
+        self.weekends_check = QCheckBox("Include Saturday and Sunday")
+        layout.addRow("Weekends:", self.weekends_check)
 
         # Additional custom field for each day
         self.additional_field_label = QLineEdit()
         self.additional_field_label.setPlaceholderText("e.g. Vehicle Mileage")
         self.additional_field_names = QLineEdit()
-        self.additional_field_names.setPlaceholderText("Comma separated subfields, e.g. Start, End")
+        self.additional_field_names.setPlaceholderText("Comma separated subfields, e.g. Start:int, End:int")
+        self.additional_field_names.setToolTip("Optional types after a colon: int, float, time, duration (default text)")
+        self.computed_columns_input = QLineEdit()
+        self.computed_columns_input.setPlaceholderText("e.g. Miles = End - Start")
+        self.computed_columns_input.setToolTip("Semicolon separated; operators + - * / with spaces around them, evaluated left to right")
+        self.total_columns_input = QLineEdit()
+        self.total_columns_input.setPlaceholderText("Columns to total for the week, e.g. Miles")
         layout.addRow("Additional Field Name (optional):", self.additional_field_label)
         layout.addRow("Subfields (comma separated):", self.additional_field_names)
+        layout.addRow("Computed Columns:", self.computed_columns_input)
+        layout.addRow("Totals Row:", self.total_columns_input)
+
+        self.archive_dir_input = QLineEdit()
+        self.archive_dir_input.setPlaceholderText("Also save a copy of every PDF here (optional)")
+        archive_button = QPushButton("Choose Folder")
+        archive_button.clicked.connect(self.choose_archive_dir)
+        archive_layout = QHBoxLayout()
+        archive_layout.addWidget(self.archive_dir_input)
+        archive_layout.addWidget(archive_button)
+        layout.addRow("Archive Folder:", archive_layout)
+
+        self.autosave_check = QCheckBox("Save changes automatically while typing")
+        self.autosave_check.setChecked(True)
+        layout.addRow("Autosave:", self.autosave_check)
+
+        self.sync_url_input = QLineEdit()
+        self.sync_url_input.setPlaceholderText("e.g. http://teamserver:8765 (optional)")
+        self.sync_token_input = QLineEdit()
+        self.sync_token_input.setEchoMode(QLineEdit.Password)
+        layout.addRow("Sync Server URL:", self.sync_url_input)
+        layout.addRow("Sync Token:", self.sync_token_input)
 
         self.save_button = QPushButton("Save Settings")
         self.save_button.clicked.connect(self.accept)
@@ -53,19 +95,39 @@ class SettingsDialog(QDialog):
         if file_path:
             self.logo_path_input.setText(file_path)
 
+    def choose_archive_dir(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Archive Folder", self.archive_dir_input.text())
+        if folder:
+            self.archive_dir_input.setText(folder)
+
     def get_settings(self):
         additional_field = self.additional_field_label.text().strip()
-        subfields = [s.strip() for s in self.additional_field_names.text().split(',') if s.strip()]
+        subfields, subfield_types = parse_subfield_spec(self.additional_field_names.text())
         return {
             'name': self.name_input.text(),
             'agency': self.agency_input.text(),
             'location': self.location_input.text(),
             'logo': self.logo_path_input.text(),
             'report_range': self.range_combo.currentText(),
+            'holidays': [h.strip() for h in self.holidays_input.text().split(',') if h.strip()],
+            'include_weekends': self.weekends_check.isChecked(),
             'additional_field': additional_field,
-            'additional_subfields': subfields
+            'additional_subfields': subfields,
+            'subfield_types': subfield_types,
+            'computed_columns': parse_computed_spec(self.computed_columns_input.text()),
+            'total_columns': [c.strip() for c in self.total_columns_input.text().split(',') if c.strip()],
+            'archive_dir': self.archive_dir_input.text().strip(),
+            'autosave': self.autosave_check.isChecked()
         }
 
+    def get_sync(self):
+        # Kept out of get_settings: the token must not travel with the report
+        return self.sync_url_input.text().strip(), self.sync_token_input.text().strip()
+
+    def set_sync(self, url, token):
+        self.sync_url_input.setText(url)
+        self.sync_token_input.setText(token)
+
     def set_settings(self, settings):
         self.name_input.setText(settings.get('name', ''))
         self.agency_input.setText(settings.get('agency', ''))
@@ -75,8 +137,14 @@ class SettingsDialog(QDialog):
             idx = self.range_combo.findText(settings['report_range'])
             if idx != -1:
                 self.range_combo.setCurrentIndex(idx)
+        self.holidays_input.setText(', '.join(settings.get('holidays', [])))
+        self.weekends_check.setChecked(settings.get('include_weekends', False))
         self.additional_field_label.setText(settings.get('additional_field', ''))
-        self.additional_field_names.setText(', '.join(settings.get('additional_subfields', [])))
+        self.additional_field_names.setText(format_subfield_spec(settings.get('additional_subfields', []), settings.get('subfield_types', {})))
+        self.computed_columns_input.setText(format_computed_spec(settings.get('computed_columns', [])))
+        self.total_columns_input.setText(', '.join(settings.get('total_columns', [])))
+        self.archive_dir_input.setText(settings.get('archive_dir', ''))
+        self.autosave_check.setChecked(settings.get('autosave', True))
 
 class AboutDialog(QDialog):
     def __init__(self, parent=None):
@@ -101,6 +169,7 @@ class AboutDialog(QDialog):
         <li>Copyable report for email</li>
         <li>Settings for user info and logo</li>
         <li>Tab navigation between fields</li>
+        <li>Search across every saved week</li>
         </ul>
         ''')
         layout.addWidget(about_text)
@@ -109,7 +178,82 @@ class AboutDialog(QDialog):
         layout.addWidget(btns)
         self.setLayout(layout)
 
+class SearchDialog(QDialog):
+    # Search panel over every saved week (data.search); results update as you type
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Search Reports")
+        self.setMinimumSize(700, 500)
+        layout = QVBoxLayout()
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Search notes, summaries and subfields (end a word with * for prefixes)")
+        self.query_input.textChanged.connect(lambda: self.search_timer.start())
+        layout.addWidget(self.query_input)
+        self.results = QTreeWidget()
+        self.results.setHeaderLabels(["Week", "Day", "Score", "Match"])
+        self.results.setRootIsDecorated(False)
+        self.results.currentItemChanged.connect(self.show_hit)
+        self.results.itemDoubleClicked.connect(self.open_hit)
+        layout.addWidget(self.results, 2)
+        self.preview = QTextBrowser()
+        layout.addWidget(self.preview, 1)
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.setLayout(layout)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.run_search)
+
+    def run_search(self):
+        from data.storage import search_history
+        from data.search import SUMMARY, snippet
+        query = self.query_input.text().strip()
+        self.results.clear()
+        self.preview.clear()
+        if not query:
+            self.status_label.clear()
+            return
+        start = time.perf_counter()
+        hits = search_history(query, 200)
+        elapsed = time.perf_counter() - start
+        for hit in hits:
+            day = "Summary" if hit['location'] == SUMMARY else hit['location']
+            item = QTreeWidgetItem([f"{hit['date_start']} – {hit['date_end']}", day, f"{hit['score']:.2f}", snippet(hit['text'], hit['matched'], 80)])
+            item.setData(0, Qt.UserRole, hit)
+            self.results.addTopLevelItem(item)
+        for column in range(3):
+            self.results.resizeColumnToContents(column)
+        self.status_label.setText(f"{len(hits)} hit(s) in {elapsed * 1000:.1f} ms")
+
+    def show_hit(self, item, previous=None):
+        if item is None:
+            return
+        from data.search import match_spans
+        hit = item.data(0, Qt.UserRole)
+        # Matches are found in the raw text; each piece is escaped on its own
+        parts, last = [], 0
+        for start, end in match_spans(hit['text'], hit['matched']):
+            parts.append(html.escape(hit['text'][last:start]))
+            parts.append(f"<b>{html.escape(hit['text'][start:end])}</b>")
+            last = end
+        parts.append(html.escape(hit['text'][last:]))
+        text = ''.join(parts)
+        self.preview.setHtml(f"<p><i>{html.escape(item.text(0))}, {html.escape(item.text(1))}</i></p><p>{text}</p>".replace('\n', '<br>'))
+
+    def open_hit(self, item, column=0):
+        # Hits in the period on screen jump to that day's panel
+        parent = self.parent()
+        day = item.data(0, Qt.UserRole)['location']
+        if parent is not None and day in parent.day_model.days():
+            parent.day_list.scroll_to_day(day)
+            parent.day_list.editor_for(day).general_input.setFocus()
+            parent.activateWindow()
+
 class MainWindow(QMainWindow):
+    # Storage problems reported from the writer thread; delivered on the GUI thread
+    storageFailed = Signal(str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Weekly Action Report")
@@ -119,6 +263,20 @@ class MainWindow(QMainWindow):
         self.summary_text = ''
         self.settings = load_data().get('settings', {})
         self.current_days = self.get_current_days()
+        # Autosave: edits mark (day, field) pairs dirty; after a pause in typing
+        # only those fields are merged into the stored week.
+        self.dirty_fields = set()
+        self.loading = False
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(1500)
+        self.autosave_timer.timeout.connect(self.autosave)
+        self.search_dialog = None
+        # Sync server address and token found in older saves; see start_sync
+        self.legacy_sync_config = None
+        self.sync_timer = None
+        self.storageFailed.connect(self.show_storage_error)
+        set_error_handler(self.storageFailed.emit)
         self.setStyleSheet(self.dark_theme())
         self.init_ui()
         self.load_saved_data()
@@ -134,6 +292,7 @@ class MainWindow(QMainWindow):
         clear_button = QPushButton("Clear Data")
         report_button = QPushButton("Generate Report")
         richtext_button = QPushButton("Rich Text Export")
+        search_button = QPushButton("Search Reports")
         settings_button = QPushButton("Settings")
         about_button = QPushButton("About")
         reset_button = QPushButton("Reset Application")
@@ -141,6 +300,7 @@ class MainWindow(QMainWindow):
         sidebar_layout.addWidget(clear_button)
         sidebar_layout.addWidget(report_button)
         sidebar_layout.addWidget(richtext_button)
+        sidebar_layout.addWidget(search_button)
         sidebar_layout.addStretch(1)
         sidebar_layout.addWidget(settings_button)
         sidebar_layout.addWidget(reset_button)
@@ -169,89 +329,40 @@ class MainWindow(QMainWindow):
         self.header_title = QLabel("Weekly Report")
         self.header_title.setStyleSheet("font-size: 20px; font-weight: bold;")
         left_header.addWidget(self.header_title)
-        # Get header data
-        report_range = self.settings.get('report_range', 'Monday–Friday')
-        date_start, date_end = self.get_date_range()
-        name = self.settings.get('name', '')
-        agency = self.settings.get('agency', '')
-        location = self.settings.get('location', '')
-        self.header_info = QLabel(f"<b>Report Range:</b> {report_range} ({date_start} to {date_end})<br>"
-                                  f"<b>Name:</b> {name}<br>"
-                                  f"<b>Agency:</b> {agency}<br>"
-                                  f"<b>Location:</b> {location}")
+        self.header_info = QLabel()
         self.header_info.setTextFormat(Qt.RichText)
         left_header.addWidget(self.header_info)
         header_layout.addLayout(left_header)
         # Logo on top right
-        logo_path = self.settings.get('logo', '')
-        if logo_path:
-            try:
-                from PySide6.QtGui import QPixmap
-                logo_label = QLabel()
-                pixmap = QPixmap(logo_path)
-                if not pixmap.isNull():
-                    pixmap = pixmap.scaled(100, 60, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    logo_label.setPixmap(pixmap)
-                    logo_label.setAlignment(Qt.AlignRight | Qt.AlignTop)
-                    header_layout.addWidget(logo_label)
-            except Exception:
-                pass
+        self.logo_label = QLabel()
+        self.logo_label.setAlignment(Qt.AlignRight | Qt.AlignTop)
+        header_layout.addWidget(self.logo_label)
         content_layout.addLayout(header_layout)
+        self.update_header()
+        self.update_logo()
 
-        # Scroll area for day panels
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        days_widget = QWidget()
-        days_layout = QVBoxLayout()
-        self.day_widgets = {}
-        self.day_groups = {}
-        additional_field = self.settings.get('additional_field', '').strip()
-        additional_subfields = self.settings.get('additional_subfields', [])
-        for day in self.current_days:
-            group = QGroupBox(day)
-            group.setCheckable(True)
-            group.setChecked(True)
-            day_layout = QVBoxLayout()
-            # General notes
-            general_input = QTextEdit()
-            general_input.setPlaceholderText("General notes...")
-            general_input.setTabChangesFocus(True)
-            day_layout.addWidget(general_input)
-            # Additional custom field (if set)
-            additional_inputs = []
-            if additional_field:
-                additional_label = QLabel(f"{additional_field}")
-                additional_label.setStyleSheet("font-weight: bold; margin-top: 8px;")
-                day_layout.addWidget(additional_label)
-                for subfield in additional_subfields:
-                    subfield_layout = QHBoxLayout()
-                    subfield_label = QLabel(subfield+":")
-                    subfield_input = QLineEdit()
-                    subfield_input.setPlaceholderText(subfield)
-                    subfield_layout.addWidget(subfield_label)
-                    subfield_layout.addWidget(subfield_input)
-                    day_layout.addLayout(subfield_layout)
-                    additional_inputs.append((subfield, subfield_input))
-            group.setLayout(day_layout)
-            days_layout.addWidget(group)
-            self.day_widgets[day] = {
-                'general': general_input,
-                'additional_inputs': additional_inputs
-            }
-            self.day_groups[day] = group
-        days_widget.setLayout(days_layout)
-        scroll.setWidget(days_widget)
-        content_layout.addWidget(scroll)
+        # Day panels: editors are only created for the days in view
+        self.day_model = DayListModel(self)
+        self.day_model.set_days(self.current_days)
+        self.day_model.set_subfields(self.settings.get('additional_field', '').strip(), self.settings.get('additional_subfields', []), types=self.settings.get('subfield_types', {}))
+        self.day_model.fieldChanged.connect(self.mark_dirty)
+        self.day_list = DayListView(self.day_model)
+        content_layout.addWidget(self.day_list)
 
         # Summary/comments section
         summary_layout = QVBoxLayout()
         summary_label = QLabel("Summary/Comments:")
         self.summary_input = QTextEdit()
         self.summary_input.setTabChangesFocus(True)
+        self.summary_input.textChanged.connect(lambda: self.mark_dirty('summary', None))
         summary_layout.addWidget(summary_label)
         summary_layout.addWidget(self.summary_input)
         content_layout.addLayout(summary_layout)
 
+        # Running exports (PDF, rich text, archive copies) with progress and Cancel
+        self.export_jobs = ExportJobsPanel()
+        content_layout.addWidget(self.export_jobs)
+
         # Theme toggle at bottom of content
         theme_toggle = QPushButton("Toggle Theme")
         theme_toggle.clicked.connect(self.toggle_theme)
@@ -278,10 +389,60 @@ class MainWindow(QMainWindow):
         report_button.clicked.connect(self.generate_report)
         settings_button.clicked.connect(self.open_settings)
         richtext_button.clicked.connect(self.export_rich_text)
+        search_button.clicked.connect(self.show_search)
         about_button.clicked.connect(self.show_about)
         self.splitter = splitter
         reset_button.clicked.connect(self.reset_application)
 
+    def update_header(self):
+        report_range = self.settings.get('report_range', 'Monday–Friday')
+        date_start, date_end = self.get_date_range()
+        name = self.settings.get('name', '')
+        agency = self.settings.get('agency', '')
+        location = self.settings.get('location', '')
+        self.header_info.setText(f"<b>Report Range:</b> {report_range} ({date_start} to {date_end})<br>"
+                                 f"<b>Name:</b> {name}<br>"
+                                 f"<b>Agency:</b> {agency}<br>"
+                                 f"<b>Location:</b> {location}")
+
+    def update_logo(self):
+        self.logo_label.clear()
+        self.logo_label.hide()
+        logo_path = get_logo(self.settings.get('logo', ''))
+        if logo_path:
+            try:
+                from PySide6.QtGui import QPixmap
+                pixmap = QPixmap(logo_path)
+                if not pixmap.isNull():
+                    pixmap = pixmap.scaled(100, 60, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                    self.logo_label.setPixmap(pixmap)
+                    self.logo_label.show()
+            except Exception:
+                pass
+
+    def apply_settings(self, old_settings):
+        # Update only the parts of the window affected by a settings change
+        data = load_data()
+        days_changed = any(old_settings.get(key) != self.settings.get(key) for key in ('report_range', 'holidays', 'include_weekends'))
+        self.loading = True
+        try:
+            if days_changed:
+                self.current_days = self.get_current_days()
+                self.day_model.set_days(self.current_days, upgrade_day_keys(data, self.current_days))
+            if any(old_settings.get(key) != self.settings.get(key) for key in ('additional_field', 'additional_subfields', 'subfield_types')):
+                self.day_model.set_subfields(self.settings.get('additional_field', '').strip(), self.settings.get('additional_subfields', []), data, self.settings.get('subfield_types', {}))
+            if any(old_settings.get(key) != self.settings.get(key) for key in ('name', 'agency', 'location', 'report_range')):
+                self.update_header()
+            if old_settings.get('logo') != self.settings.get('logo'):
+                self.update_logo()
+        finally:
+            self.loading = False
+        if days_changed:
+            # The carried-over days exist only in the model so far, and
+            # update_data starts a fresh document for a new date_range; write
+            # the whole period now so later autosaves merge into it
+            save_data(self.current_document())
+
     def toggle_sidebar(self):
         if self.sidebar_widget.isVisible():
             self.sidebar_widget.hide()
@@ -291,150 +452,199 @@ class MainWindow(QMainWindow):
             self.splitter.setSizes([170, 1])
 
     def get_current_days(self):
-        report_range = self.settings.get('report_range', 'Monday–Friday')
-        if report_range == "Thursday–Thursday":
-            days = ["Thursday", "Friday", "Monday", "Tuesday", "Wednesday", "Thursday"]
-            return [d for d in days if d not in ["Saturday", "Sunday"]]
-        return ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+        return days_for(self.settings)
 
     def get_date_range(self):
-        today = datetime.today()
-        if hasattr(self, 'range_combo') and self.range_combo.currentIndex() == 1:
-            # Thursday–Thursday
-            # Find the most recent Thursday
-            offset = (today.weekday() - 3) % 7
-            start = today - timedelta(days=offset)
-            end = start + timedelta(days=6)
-            # Remove Saturday and Sunday from range
-            days = []
-            d = start
-            while d <= end:
-                if d.weekday() not in (5, 6):
-                    days.append(d)
-                d += timedelta(days=1)
-            return days[0].strftime('%Y-%m-%d'), days[-1].strftime('%Y-%m-%d')
-        else:
-            # Monday–Friday
-            offset = (today.weekday() - 0) % 7
-            start = today - timedelta(days=offset)
-            end = start + timedelta(days=4)
-            return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
-
-    def save_all_data(self):
-        data = {}
-        for day, widgets in self.day_widgets.items():
-            additional_data = {}
-            if 'additional_inputs' in widgets:
-                for subfield, input_widget in widgets['additional_inputs']:
-                    additional_data[subfield] = input_widget.text()
-            data[day] = {
-                'general': widgets['general'].toPlainText(),
-                'additional': additional_data
-            }
+        return range_for(self.settings)
+
+    def autosave_enabled(self):
+        return self.settings.get('autosave', True)
+
+    def mark_dirty(self, day, field):
+        if self.loading or not self.autosave_enabled():
+            return
+        self.dirty_fields.add((day, field))
+        self.autosave_timer.start()
+
+    def autosave(self):
+        self.autosave_timer.stop()
+        if not self.dirty_fields:
+            return
+        changes = {}
+        for day, field in self.dirty_fields:
+            if day == 'summary':
+                changes['summary'] = self.summary_input.toPlainText()
+                continue
+            if day not in self.day_model.days():
+                continue
+            daydata = changes.setdefault(day, {})
+            if field == 'general':
+                daydata['general'] = self.day_model.general(day)
+            elif field in self.day_model.subfields:
+                daydata.setdefault('additional', {})[field] = self.day_model.typed_additional(day, field)
+        self.dirty_fields.clear()
+        changes['settings'] = self.settings
+        changes['report_range'] = self.settings.get('report_range', 'Monday–Friday')
+        changes['date_range'] = self.get_date_range()
+        update_data(changes)
+
+    def current_document(self):
+        data = self.day_model.week_data()
         data['summary'] = self.summary_input.toPlainText()
         data['settings'] = self.settings
         data['report_range'] = self.settings.get('report_range', 'Monday–Friday')
         data['date_range'] = self.get_date_range()
-        save_data(data)
-        # Visual confirmation
+        return data
+
+    def save_all_data(self):
+        self.autosave_timer.stop()
+        self.dirty_fields.clear()
+        save_data(self.current_document())
+        # Visual confirmation, once the save is actually on disk
+        flush()
+        error = save_error()
+        if error is not None:
+            QMessageBox.warning(self, "Save Failed", f"Your data could not be saved:\n{error}")
+            return
         QMessageBox.information(self, "Saved", "Data saved successfully.")
 
+    def show_storage_error(self, message):
+        # Autosaves have no dialog of their own; failures show here
+        self.statusBar().showMessage(f"Not saved: {message}", 30000)
+
     def load_saved_data(self):
+        self.loading = True
+        try:
+            self._load_saved_data()
+        finally:
+            self.loading = False
+
+    def _load_saved_data(self):
         data = load_data()
         # Restore settings if present
         if 'settings' in data:
             self.settings = data['settings']
-        for day, widgets in self.day_widgets.items():
-            if day in data:
-                widgets['general'].setPlainText(data[day].get('general', ''))
-                if 'additional_inputs' in widgets and 'additional' in data[day]:
-                    for subfield, input_widget in widgets['additional_inputs']:
-                        input_widget.setText(data[day]['additional'].get(subfield, ''))
-        self.summary_input.setPlainText(data.get('summary', ''))
+        # Older versions kept the sync server and token in the settings; they
+        # move to the sync config and out of every saved document
+        if any(key in self.settings for key in ('sync_url', 'sync_token')):
+            self.legacy_sync_config = (self.settings.get('sync_url', ''), self.settings.get('sync_token', ''))
+            self.settings = {key: value for key, value in self.settings.items() if key not in ('sync_url', 'sync_token')}
+            save_data(dict(data, settings=self.settings))
+        # Saves from before dated day keys are loaded by weekday; otherwise only
+        # days (and the summary) of the current period are restored
+        legacy = any(day in data for day in WEEKDAYS)
+        saved_range = list(data.get('date_range') or [])
+        current = saved_range == list(self.get_date_range()) or (legacy and not saved_range)
+        if legacy and not current:
+            # A legacy save from an earlier period: file it in history under
+            # its own dates, and start the current period empty
+            self.record_legacy_week(data, saved_range)
+        self.day_model.load(upgrade_day_keys(data, self.current_days) if current else data)
+        self.summary_input.setPlainText(data.get('summary', '') if current else '')
+        if legacy:
+            # Rewrite the save with dated keys so it is only upgraded once
+            save_data(self.current_document())
+
+    def record_legacy_week(self, data, saved_range):
+        from data.history import get_history
+        day_keys = days_between(data.get('settings', self.settings), *saved_range)
+        upgraded = upgrade_day_keys(data, day_keys)
+        week = {key: upgraded[key] for key in day_keys if isinstance(upgraded.get(key), dict)}
+        week.update((key, data[key]) for key in ('summary', 'settings', 'report_range') if key in data)
+        week['date_range'] = saved_range
+        get_history().record_week(week)
+
+    def collect_report(self):
+        # One data-collection step for both the PDF and rich text outputs,
+        # from the model's snapshot and the settings already in memory
+        from reports.report_data import collect_report
+        date_start, date_end = self.get_date_range()
+        return collect_report(self.settings, self.day_model.snapshot(), self.summary_input.toPlainText(),
+                              self.settings.get('report_range', 'Monday–Friday'), date_start, date_end)
+
+    def start_pdf_export(self, title, file_path, report, compact=False):
+        # Rendered on the export pool; ReportLab is imported there too
+        def work(progress):
+            from reports.pdf_generator import compact_options, default_options, write_pdf_report
+            write_pdf_report(file_path, report, lambda page: progress(f"Page {page}"),
+                             options=compact_options if compact else default_options)
+            return file_path
+        self.export_jobs.start(title, work,
+                               lambda path: self.notify(f"{title} saved to {path}"),
+                               lambda message: self.export_failed(title, message))
 
     def generate_report(self):
-        week_data = {}
-        for day, widgets in self.day_widgets.items():
-            additional_data = {}
-            if 'additional_inputs' in widgets:
-                for subfield, input_widget in widgets['additional_inputs']:
-                    additional_data[subfield] = input_widget.text()
-            week_data[day] = {
-                'general': widgets['general'].toPlainText(),
-                'additional': additional_data
-            }
-        summary = self.summary_input.toPlainText()
-        all_data = load_data()
-        settings = all_data.get('settings', {})
-        report_range = self.settings.get('report_range', 'Monday–Friday')
-        date_start, date_end = self.get_date_range()
         file_path, _ = QFileDialog.getSaveFileName(self, "Save PDF Report", self.last_pdf_path or "WeeklyReport.pdf", "PDF Files (*.pdf)")
         if file_path:
             self.last_pdf_path = file_path
-            additional_field = settings.get('additional_field', '').strip()
-            additional_subfields = settings.get('additional_subfields', [])
-            generate_pdf_report(file_path, settings, week_data, summary, report_range, date_start, date_end, additional_field, additional_subfields)
-            QMessageBox.information(self, "Report Generated", f"PDF report saved to:\n{file_path}")
+            report = self.collect_report()
+            self.start_pdf_export("PDF report", file_path, report)
+            archive_dir = self.settings.get('archive_dir', '')
+            if archive_dir:
+                archive_path = os.path.join(archive_dir, f"WeeklyReport_{report.date_start}_{report.date_end}.pdf")
+                if os.path.abspath(archive_path) != os.path.abspath(file_path):
+                    # Archive copies are kept for good; store them compact
+                    self.start_pdf_export("Archive copy", archive_path, report, compact=True)
+
+    def start_sync(self):
+        from data import sync
+        if self.legacy_sync_config is not None:
+            sync.save_config(*self.legacy_sync_config)
+            self.legacy_sync_config = None
+        config = sync.load_config()
+        sync.configure(config['url'], config['token'])
+        # Sync runs on its own thread; its messages are collected here
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setInterval(3000)
+        self.sync_timer.timeout.connect(self.show_sync_notices)
+        self.sync_timer.start()
+
+    def show_sync_notices(self):
+        from data import sync
+        messages = sync.notices()
+        if messages:
+            self.statusBar().showMessage(messages[-1] if len(messages) == 1 else f"{messages[-1]} (+{len(messages) - 1} more)", 15000)
+
+    def notify(self, message):
+        # Completion notice that does not interrupt typing
+        self.statusBar().showMessage(message, 10000)
+        QApplication.alert(self)
+
+    def export_failed(self, title, message):
+        QMessageBox.warning(self, "Export Failed", f"{title} could not be written:\n{message}")
 
     def open_settings(self):
         settings = load_data().get('settings', {})
+        from data import sync
         dialog = SettingsDialog(self)
         dialog.set_settings(settings)
+        config = sync.load_config()
+        dialog.set_sync(config['url'], config['token'])
         if dialog.exec() == QDialog.Accepted:
+            url, token = dialog.get_sync()
+            if (url, token) != (config['url'], config['token']):
+                sync.save_config(url, token)
+                sync.configure(url, token)
+            # Persist pending edits first; panels added below are filled from storage
+            self.autosave()
             all_data = load_data()
             all_data['settings'] = dialog.get_settings()
             self.last_logo_path = dialog.logo_path_input.text()
             save_data(all_data)
+            old_settings = self.settings
             self.settings = all_data['settings']
-            self.current_days = self.get_current_days()
-            self.takeCentralWidget()
-            self.init_ui()
-            self.load_saved_data()
+            self.apply_settings(old_settings)
 
     def export_rich_text(self):
-        # Gather data from UI
-        week_data = {}
-        for day, widgets in self.day_widgets.items():
-            additional_data = {}
-            if 'additional_inputs' in widgets:
-                for subfield, input_widget in widgets['additional_inputs']:
-                    additional_data[subfield] = input_widget.text()
-            week_data[day] = {
-                'general': widgets['general'].toPlainText(),
-                'additional': additional_data
-            }
-        summary = self.summary_input.toPlainText()
-        all_data = load_data()
-        settings = all_data.get('settings', {})
-        report_range = self.settings.get('report_range', 'Monday–Friday')
-        date_start, date_end = self.get_date_range()
-        additional_field = settings.get('additional_field', '').strip()
-        additional_subfields = settings.get('additional_subfields', [])
-        # Build HTML
-        html = f"""
-        <h2>Weekly Report</h2>
-        <b>Report Range:</b> {report_range} ({date_start} to {date_end})<br>
-        <b>Name:</b> {settings.get('name', '')}<br>
-        <b>Agency:</b> {settings.get('agency', '')}<br>
-        <b>Location:</b> {settings.get('location', '')}<br><br>
-        <table border='1' cellpadding='4' cellspacing='0'>
-        <tr>
-            <th>Day</th>
-            <th>General Notes</th>
-            {''.join(f'<th>{sub}</th>' for sub in additional_subfields) if additional_field and additional_subfields else ''}
-        </tr>
-        """
-        for day, daydata in week_data.items():
-            general = daydata.get('general', '').replace('\n', '<br>')
-            additional = daydata.get('additional', {})
-            html += f"<tr><td>{day}</td><td>{general}</td>"
-            if additional_field and additional_subfields:
-                for sub in additional_subfields:
-                    html += f"<td>{additional.get(sub, '')}</td>"
-            html += "</tr>"
-        html += "</table><br>"
-        summary_html = summary.replace('\n', '<br>')
-        html += f"<b>Summary/Comments:</b><br>{summary_html}"
+        report = self.collect_report()
+
+        def work(progress):
+            from reports.rich_text import render_rich_text
+            return render_rich_text(report)
+        self.export_jobs.start("Rich text", work, self.show_rich_text,
+                               lambda message: self.export_failed("Rich text", message))
+
+    def show_rich_text(self, html):
         # Show in dialog
         dlg = QDialog(self)
         dlg.setWindowTitle("Rich Text Report (Copy for Email)")
@@ -458,12 +668,12 @@ class MainWindow(QMainWindow):
             self.clear_all_data()
 
     def clear_all_data(self):
-        for widgets in self.day_widgets.values():
-            widgets['general'].clear()
-            if 'additional_inputs' in widgets:
-                for _, input_widget in widgets['additional_inputs']:
-                    input_widget.clear()
+        self.autosave_timer.stop()
+        self.dirty_fields.clear()
+        self.loading = True
+        self.day_model.clear()
         self.summary_input.clear()
+        self.loading = False
         clear_data()
         QMessageBox.information(self, "Cleared", "All data has been cleared.")
 
@@ -527,6 +737,36 @@ class MainWindow(QMainWindow):
         }
         """
 
+    def closeEvent(self, event):
+        # Saves are written in the background; make sure they reach disk before exit
+        if self.export_jobs.running():
+            reply = QMessageBox.question(self, "Exports Running",
+                                         "Reports are still being exported. Wait for them to finish?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+            if reply == QMessageBox.No:
+                self.export_jobs.cancel_all()
+            self.export_jobs.wait()
+        self.autosave()
+        flush()
+        error = save_error()
+        if error is not None:
+            reply = QMessageBox.question(self, "Save Failed",
+                                         f"Your latest changes could not be saved:\n{error}\n\nQuit anyway?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply == QMessageBox.No:
+                event.ignore()
+                return
+        set_error_handler(None)
+        super().closeEvent(event)
+
+    def show_search(self):
+        # Kept between uses so the last query and results stay put
+        if self.search_dialog is None:
+            self.search_dialog = SearchDialog(self)
+        self.search_dialog.show()
+        self.search_dialog.raise_()
+        self.search_dialog.query_input.setFocus()
+
     def show_about(self):
         dlg = AboutDialog(self)
         dlg.exec()
@@ -549,6 +789,16 @@ def main():
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
+    # Deferred like the other heavy modules: asyncio, ssl and sqlite3 load
+    # after the window is up
+    QTimer.singleShot(0, window.start_sync)
+    if '--startup-time' in sys.argv:
+        # Report time until the first event loop pass after show, then exit
+        # (used by benchmarks/startup_profile.py)
+        def report_startup():
+            print(f"startup: {(time.perf_counter() - _start_time) * 1000:.1f} ms", flush=True)
+            app.quit()
+        QTimer.singleShot(0, report_startup)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
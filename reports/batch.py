@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from reports.pdf_generator import compact_options, default_options, pdf_size, write_pdf_report
+from reports.report_data import collect_week
+
+# Headless batch rendering: python -m reports.batch <json dir> -o <pdf dir>
+# No Qt imports here so worker processes stay light.
+
+def find_report_files(input_dir):
+    return sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if name.lower().endswith('.json')
+    )
+
+def render_report_file(json_path, output_dir, use_cache=True, options=default_options, compare=False):
+    # Returns (pdf path, seconds, served from cache, bytes, bytes with the
+    # default options or None). The comparison render stays in memory.
+    start = time.perf_counter()
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    pdf_name = os.path.splitext(os.path.basename(json_path))[0] + '.pdf'
+    pdf_path = os.path.join(output_dir, pdf_name)
+    report = collect_week(data)
+    cached = write_pdf_report(pdf_path, report, use_cache=use_cache, options=options)
+    elapsed = time.perf_counter() - start
+    baseline = pdf_size(lambda f: write_pdf_report(f, report)) if compare else None
+    return pdf_path, elapsed, cached, os.path.getsize(pdf_path), baseline
+
+def _render_safe(json_path, output_dir, use_cache=True, options=default_options, compare=False):
+    try:
+        pdf_path, elapsed, cached, size, baseline = render_report_file(json_path, output_dir, use_cache, options, compare)
+        return json_path, pdf_path, elapsed, None, cached, size, baseline
+    except Exception as e:
+        return json_path, None, 0.0, f"{type(e).__name__}: {e}", False, 0, None
+
+def run_batch(files, output_dir, jobs=None, out=sys.stdout, use_cache=True, options=default_options, compare=False):
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = jobs or os.cpu_count() or 1
+    results = []
+    start = time.perf_counter()
+
+    def report(result):
+        json_path, pdf_path, elapsed, error, cached, size, baseline = result
+        name = os.path.basename(json_path)
+        if error:
+            print(f"FAIL  {name}: {error}", file=out)
+        else:
+            sizes = f"  {baseline / 1024:.1f} -> {size / 1024:.1f} KiB" if baseline else ''
+            print(f"{elapsed * 1000:8.1f} ms  {name} -> {pdf_path}{sizes}{'  (cached)' if cached else ''}", file=out)
+        results.append(result)
+
+    if jobs == 1 or len(files) <= 1:
+        for json_path in files:
+            report(_render_safe(json_path, output_dir, use_cache, options, compare))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_render_safe, json_path, output_dir, use_cache, options, compare) for json_path in files]
+            for future in as_completed(futures):
+                report(future.result())
+
+    total = time.perf_counter() - start
+    failed = sum(1 for r in results if r[3])
+    done = len(results) - failed
+    rate = done / total if total > 0 else 0.0
+    print(f"\n{done} rendered, {failed} failed in {total:.2f} s "
+          f"({rate:.1f} reports/s, {jobs} worker{'s' if jobs != 1 else ''})", file=out)
+    if use_cache and done:
+        hits = sum(1 for r in results if r[4])
+        print(f"PDF cache: {hits} of {done} unchanged ({hits / done:.0%} hit rate), {done - hits} laid out", file=out)
+    written = sum(r[5] for r in results)
+    if compare and done:
+        before = sum(r[6] for r in results if r[6])
+        print(f"Output: {before / 1024:.1f} KiB with the full-resolution logo -> {written / 1024:.1f} KiB "
+              f"({1 - written / before:.0%} smaller)", file=out)
+    elif done:
+        print(f"Output: {written / 1024:.1f} KiB", file=out)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m reports.batch', description="Render a directory of saved weekly report JSON files to PDF.")
+    parser.add_argument('input_dir', help="Directory containing saved report .json files")
+    parser.add_argument('-o', '--output-dir', default=None, help="Where to write PDFs (default: <input_dir>/pdf)")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--no-cache', action='store_true', help="Lay out every report even if an identical PDF is cached")
+    parser.add_argument('--compact', action='store_true', help="Smaller PDFs for archiving and email: lower-resolution logo")
+    parser.add_argument('--dpi', type=int, default=None, help=f"Logo resolution with --compact (default: {compact_options.logo_dpi})")
+    parser.add_argument('--compare', action='store_true', help="Also measure each report with the default full-resolution logo and print before/after sizes")
+    args = parser.parse_args(argv)
+    files = find_report_files(args.input_dir)
+    if not files:
+        print(f"No .json files found in {args.input_dir}", file=sys.stderr)
+        return 1
+    output_dir = args.output_dir or os.path.join(args.input_dir, 'pdf')
+    options = default_options
+    if args.compact:
+        options = compact_options._replace(logo_dpi=args.dpi or compact_options.logo_dpi)
+    results = run_batch(files, output_dir, args.jobs, use_cache=not args.no_cache, options=options, compare=args.compare)
+    return 1 if any(r[3] for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
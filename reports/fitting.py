@@ -0,0 +1,78 @@
+from functools import lru_cache
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# Font fitting from real glyph metrics. Widths of the standard PDF fonts scale
+# linearly with size, so each (string, font) is measured once at size 1 and
+# reused for every candidate size.
+
+font_sizes = (11, 10, 9, 8, 7)
+
+@lru_cache(maxsize=65536)
+def unit_width(text, font_name):
+    return stringWidth(text, font_name, 1)
+
+def leading_for(font_size):
+    # 11 -> 14, 9 -> 12, 8 -> 10, matching the fixed pairs used before
+    return round(font_size * 1.25 + 0.5)
+
+def count_lines(text, font_name, font_size, width):
+    # Greedy word wrap, splitting words wider than the column the way
+    # ReportLab's splitLongWords does
+    if width <= 0:
+        return 0
+    space = unit_width(' ', font_name) * font_size
+    lines = 0
+    for paragraph in text.split('\n'):
+        lines += 1
+        line_width = 0.0
+        for word in paragraph.split():
+            word_width = unit_width(word, font_name) * font_size
+            if word_width > width:
+                # Long words are split character by character, starting on
+                # the current line
+                if line_width:
+                    line_width += space
+                for char in word:
+                    char_width = unit_width(char, font_name) * font_size
+                    if line_width and line_width + char_width > width:
+                        lines += 1
+                        line_width = char_width
+                    else:
+                        line_width += char_width
+            elif line_width == 0.0:
+                line_width = word_width
+            elif line_width + space + word_width <= width:
+                line_width += space + word_width
+            else:
+                lines += 1
+                line_width = word_width
+    return lines
+
+def text_height(text, font_name, font_size, width):
+    return count_lines(text, font_name, font_size, width) * leading_for(font_size)
+
+def words_fit(text, font_name, font_size, width):
+    # True when no word has to be broken across lines
+    return all(unit_width(word, font_name) * font_size <= width for word in text.split())
+
+def fit_table_font(rows, col_widths, font_name, max_height, row_padding=8, sizes=font_sizes):
+    # rows: list of cell-text lists; col_widths: usable text width per column.
+    # Picks the largest size at which no word in the first column (day names)
+    # is broken and the wrapped table height is within max_height.
+    for font_size in sizes:
+        if not all(words_fit(row[0], font_name, font_size, col_widths[0]) for row in rows):
+            continue
+        height = 0
+        for row in rows:
+            height += max(text_height(cell, font_name, font_size, w) for cell, w in zip(row, col_widths)) + row_padding
+            if height > max_height:
+                break
+        else:
+            return font_size
+    return sizes[-1]
+
+def fit_text_font(text, font_name, width, max_height, sizes=font_sizes):
+    for font_size in sizes:
+        if text_height(text, font_name, font_size, width) <= max_height:
+            return font_size
+    return sizes[-1]
@@ -0,0 +1,95 @@
+import os
+import hashlib
+import threading
+
+# Downsampled copies of the header logo, shared by the main window and the PDF
+# generator. The source image is decoded once per (path, mtime, size, box) and
+# the result is kept on disk, so later runs and batch workers only read a
+# small file. Opaque logos are stored as JPEG, which ReportLab embeds as-is
+# without re-compressing; logos with transparency stay PNG.
+cache_dir = os.path.join(os.path.expanduser("~"), ".wrapup_cache", "logos")
+
+# Printed logo box in the PDF header, in inches
+logo_box = (1.2, 0.7)
+default_dpi = 300
+default_quality = 90
+
+_memory = {}
+_readers = {}
+_lock = threading.Lock()
+
+def box_pixels(dpi=None):
+    # Pixel size of the printed logo box at `dpi`
+    dpi = dpi or default_dpi
+    return int(logo_box[0] * dpi), int(logo_box[1] * dpi)
+
+def _cache_key(path, max_width, max_height, quality):
+    st = os.stat(path)
+    raw = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{max_width}x{max_height}"
+    if quality != default_quality:
+        raw += f"|q{quality}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def _find_cached(key):
+    for ext in ('.jpg', '.png'):
+        candidate = os.path.join(cache_dir, key + ext)
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+def _encode(path, key, max_width, max_height, quality):
+    from PIL import Image
+    with Image.open(path) as img:
+        img.load()
+        has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+        img.thumbnail((max_width, max_height), Image.LANCZOS)
+        os.makedirs(cache_dir, exist_ok=True)
+        ext = '.png' if has_alpha else '.jpg'
+        target = os.path.join(cache_dir, key + ext)
+        tmp_path = target + f".{os.getpid()}.tmp"
+        if has_alpha:
+            img.save(tmp_path, format='PNG', optimize=True)
+        else:
+            img.save(tmp_path, format='JPEG', quality=quality, optimize=True)
+        os.replace(tmp_path, target)
+    return target
+
+def get_logo(path, max_width=None, max_height=None, quality=default_quality):
+    # Returns the path of a downsampled copy of `path`, or `path` itself when it
+    # cannot be processed (missing Pillow, unreadable image). None if missing.
+    # quality applies to opaque logos, which are stored as JPEG.
+    if not path or not os.path.exists(path):
+        return None
+    if max_width is None or max_height is None:
+        max_width, max_height = box_pixels()
+    try:
+        key = _cache_key(path, max_width, max_height, quality)
+    except OSError:
+        return None
+    with _lock:
+        cached = _memory.get(key)
+        if cached and os.path.exists(cached):
+            return cached
+        cached = _find_cached(key)
+        if cached is None:
+            try:
+                cached = _encode(path, key, max_width, max_height, quality)
+            except Exception:
+                return path
+        _memory[key] = cached
+        return cached
+
+def get_logo_reader(path, max_width=None, max_height=None, quality=default_quality):
+    # ReportLab ImageReader for the cached logo, reused across PDF builds in this
+    # process so the pixel data is decoded only once.
+    from reportlab.lib.utils import ImageReader
+    cached = get_logo(path, max_width, max_height, quality)
+    if cached is None:
+        return None
+    with _lock:
+        reader = _readers.get(cached)
+        if reader is None:
+            reader = ImageReader(cached)
+            _readers[cached] = reader
+        return reader
@@ -0,0 +1,129 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+# Finished PDFs, filed under a hash of everything that goes into one: the
+# generator version, the header settings, the collected report data (rows,
+# columns, totals, summary, dates) and the logo's bytes. A report whose inputs
+# have not changed is copied from here instead of being laid out again.
+# The directory is kept under max_bytes by evicting the least recently used
+# files; a hit refreshes the file's mtime.
+cache_dir = os.path.join(os.path.expanduser("~"), ".wrapup_cache", "pdfs")
+max_bytes = 256 * 1024 * 1024
+# Off in benchmarks, which time the layout itself
+enabled = True
+
+# Settings the PDF actually shows; other settings (autosave, sync, ...) do
+# not invalidate cached reports
+header_keys = ('name', 'agency', 'location')
+
+_stats = {'hits': 0, 'misses': 0}
+_logo_digests = {}
+_state = {'size': None}
+_lock = threading.Lock()
+
+def _logo_digest(path):
+    # Hash of the logo file's bytes, remembered per (path, mtime, size)
+    if not path or not os.path.exists(path):
+        return ''
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    with _lock:
+        digest = _logo_digests.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b''):
+                h.update(block)
+        digest = h.hexdigest()
+        with _lock:
+            _logo_digests[key] = digest
+    return digest
+
+def report_key(report, version, extra=()):
+    # report: ReportData; extra: any renderer options that change the output
+    settings = report.settings
+    inputs = {
+        'version': version,
+        'header': [settings.get(key, '') for key in header_keys],
+        'logo': _logo_digest(settings.get('logo')),
+        'report': list(report[1:]),
+        'extra': list(extra),
+    }
+    return hashlib.sha256(json.dumps(inputs, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def _path_for(key):
+    return os.path.join(cache_dir, key[:2], key + '.pdf')
+
+def fetch(key, filename):
+    # Copies the cached PDF for `key` to filename; False when there is none
+    cached = _path_for(key)
+    try:
+        shutil.copyfile(cached, filename)
+        os.utime(cached)
+    except FileNotFoundError:
+        with _lock:
+            _stats['misses'] += 1
+        return False
+    with _lock:
+        _stats['hits'] += 1
+    return True
+
+def store(key, filename):
+    # Adds a freshly rendered PDF under `key`, then trims the cache
+    cached = _path_for(key)
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    tmp_path = cached + f".{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.copyfile(filename, tmp_path)
+    os.replace(tmp_path, cached)
+    size = os.path.getsize(cached)
+    with _lock:
+        if _state['size'] is not None:
+            _state['size'] += size
+        over = _state['size'] is None or _state['size'] > max_bytes
+    if over:
+        evict()
+
+def _entries():
+    for root, _, names in os.walk(cache_dir):
+        for name in names:
+            if name.endswith('.pdf'):
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield st.st_mtime_ns, st.st_size, path
+
+def evict(limit=None):
+    # Removes least recently used PDFs until the cache is within 90% of the
+    # limit; returns bytes freed. Other processes may share the directory, so
+    # the size is re-measured here rather than trusted.
+    limit = max_bytes if limit is None else limit
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    if total > limit:
+        target = limit * 9 // 10
+        for _, size, path in entries:
+            if total - freed <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            freed += size
+    with _lock:
+        _state['size'] = total - freed
+    return freed
+
+def cache_stats():
+    with _lock:
+        return dict(_stats)
+
+def clear():
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    with _lock:
+        _state['size'] = 0
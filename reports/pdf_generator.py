@@ -3,159 +3,307 @@ from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 from reportlab.lib import colors
-from reportlab.platypus import Paragraph, Table, TableStyle, SimpleDocTemplate, Spacer
+from reportlab.platypus import Paragraph, Table, TableStyle, SimpleDocTemplate, Spacer, PageBreak, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT
+from reportlab.lib.units import inch
+import io
 import os
+import hashlib
+import threading
+from collections import namedtuple
+from html import escape
+from reports import pdf_cache
+from reports.logo_cache import box_pixels, default_dpi, default_quality, get_logo_reader
+from reports.fitting import fit_table_font, fit_text_font, text_height, leading_for
+from reports.report_data import collect_report, collect_week
+
+# Output size controls. The logo is downsampled to its printed box at
+# logo_dpi. Page streams are Flate-compressed in every mode; that is
+# ReportLab's own default (rl_config.pageCompression), so it is not an option.
+PdfOptions = namedtuple('PdfOptions', 'logo_dpi logo_quality')
+default_options = PdfOptions(default_dpi, default_quality)
+# For archives and email: screen-resolution logo, smaller JPEG
+compact_options = PdfOptions(150, 75)
+
+# ReportLab keeps module-level state (font and image caches), and the logo
+# ImageReaders from reports.logo_cache are shared between documents, so only
+# one PDF is laid out at a time per process. The export pool, the team server
+# and any other caller all go through this lock; cache hits skip it.
+render_lock = threading.RLock()
+
+def draw_logo(canvas, logo_path, x, y, width, height, options=default_options, forms=None):
+    # forms: names of the logo form XObjects already in this document, kept
+    # by the caller for the whole build. The logo is drawn once into a form;
+    # every later page that shows it (each week of a rollup) only references
+    # that form. Without `forms` the image is drawn in place.
+    logo = get_logo_reader(logo_path, *box_pixels(options.logo_dpi), options.logo_quality)
+    if logo is None:
+        return
+    if forms is None:
+        canvas.drawImage(logo, x, y, width=width, height=height, preserveAspectRatio=True, mask='auto')
+        return
+    name = 'Logo' + hashlib.sha1(f"{logo.fileName}|{width}|{height}".encode('utf-8')).hexdigest()[:16]
+    if name not in forms:
+        canvas.beginForm(name, 0, 0, width, height)
+        canvas.drawImage(logo, 0, 0, width=width, height=height, preserveAspectRatio=True, mask='auto')
+        canvas.endForm()
+        forms.add(name)
+    canvas.saveState()
+    canvas.translate(x, y)
+    canvas.doForm(name)
+    canvas.restoreState()
+
+def draw_report_header(canvas, left, top, right, settings, report_range, date_start, date_end, options=default_options, logo_forms=None):
+    # Title, header info and logo; `top` is the baseline of the title line
+    logo_width = 1.2 * inch
+    logo_height = 0.7 * inch
+    logo_x = right - logo_width
+    logo_y = top - logo_height + 10
+    # Draw logo at top right
+    logo_path = settings.get('logo')
+    if logo_path and os.path.exists(logo_path):
+        try:
+            draw_logo(canvas, logo_path, logo_x, logo_y, logo_width, logo_height, options, logo_forms)
+        except Exception:
+            pass
+    # Draw header text at top left
+    y = top
+    canvas.setFont("Helvetica-Bold", 18)
+    canvas.drawString(left, y, "Weekly Report")
+    y -= 24
+    canvas.setFont("Helvetica-Bold", 12)
+    canvas.drawString(left, y, f"Report Range: {report_range} ({date_start} to {date_end})")
+    y -= 18
+    canvas.setFont("Helvetica", 12)
+    canvas.drawString(left, y, f"Name: {settings.get('name', '')}")
+    y -= 16
+    canvas.drawString(left, y, f"Agency: {settings.get('agency', '')}")
+    y -= 16
+    canvas.drawString(left, y, f"Location: {settings.get('location', '')}")
+    y -= 12
+    canvas.setStrokeColor(colors.grey)
+    canvas.line(left, y, right, y)
+
+class WeekHeader(Flowable):
+    # In-flow version of the page header, used where several weeks share a document
+    height = 100
+
+    def __init__(self, settings, report_range, date_start, date_end, options=default_options, logo_forms=None):
+        super().__init__()
+        self.settings = settings
+        self.report_range = report_range
+        self.date_start = date_start
+        self.date_end = date_end
+        self.options = options
+        # Shared by every WeekHeader of one document; see draw_logo
+        self.logo_forms = logo_forms
+
+    def wrap(self, availWidth, availHeight):
+        self.width = availWidth
+        return availWidth, self.height
+
+    def draw(self):
+        draw_report_header(self.canv, 0, self.height - 10, self.width, self.settings, self.report_range, self.date_start, self.date_end, self.options, self.logo_forms)
+
+class FlowableStream(list):
+    # A flowable list that refills itself from an iterator of per-week chunks.
+    # doc.build consumes its list from the front, so only the week being laid
+    # out is held in memory.
+    def __init__(self, chunks):
+        super().__init__()
+        self._chunks = iter(chunks)
+
+    def __len__(self):
+        while not list.__len__(self):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self.extend(chunk)
+        return list.__len__(self)
+
+class ReportTemplate:
+    # Everything that does not depend on a report's content: paragraph styles,
+    # column widths and the table style. Build one per column layout and
+    # reuse it for every report with that layout.
+    def __init__(self, column_names=(), totals_row=False):
+        self.column_names = tuple(column_names)
+        self.totals_row = totals_row
+        styles = getSampleStyleSheet()
+        self.normal_style = ParagraphStyle('normal', parent=styles['Normal'], fontName='Helvetica', fontSize=11, leading=14)
+        self.bold_style = ParagraphStyle('bold', parent=styles['Heading4'], fontName='Helvetica-Bold', fontSize=14, leading=16)
+        # Make day column wider (80), general notes (190), subfields (90 each)
+        self.col_widths = [80, 190] + [90 for _ in self.column_names]
+        self.table_style = TableStyle([
+            ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+            ('TEXTCOLOR', (0,0), (-1,0), colors.black),
+            ('ALIGN', (0,0), (-1,-1), 'LEFT'),
+            ('VALIGN', (0,0), (-1,-1), 'TOP'),
+            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0,0), (-1,0), 13),
+            ('BOTTOMPADDING', (0,0), (-1,0), 8),
+            ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+            ('LEFTPADDING', (0,0), (-1,-1), 6),
+            ('RIGHTPADDING', (0,0), (-1,-1), 6),
+            ('TOPPADDING', (0,0), (-1,-1), 4),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
+        ])
+        self.totals_style = TableStyle(self.table_style.getCommands() + [
+            ('LINEABOVE', (0,-1), (-1,-1), 1.2, colors.black),
+            ('BACKGROUND', (0,-1), (-1,-1), colors.whitesmoke),
+        ])
+        # Usable text width per column (cell padding is 6 on each side)
+        self.text_widths = [w - 12 for w in self.col_widths]
+        # Vertical budget on the first page for font fitting: frame height
+        # minus header spacer, table header row, spacer and summary heading
+        self.font_name = self.normal_style.fontName
+        self.first_page_height = letter[1] - 50 - 40 - 12
+        self.fixed_height = 90 + 28 + 16 + 32
+        self.summary_width = letter[0] - 80 - 12
+        self.summary_max_height = 160
+        self.header_labels = ['<b>Day</b>', '<b>General Notes</b>'] + [f'<b>{escape(name, quote=False)}</b>' for name in self.column_names]
+        self._sized_styles = {}
+        self._lock = threading.Lock()
+
+    def sized_style(self, font_size, leading):
+        # One shared style per (size, leading) instead of one per table cell
+        key = (font_size, leading)
+        style = self._sized_styles.get(key)
+        if style is None:
+            with self._lock:
+                style = self._sized_styles.get(key)
+                if style is None:
+                    style = ParagraphStyle(f'cell-{font_size}-{leading}', parent=self.normal_style, fontSize=font_size, leading=leading)
+                    self._sized_styles[key] = style
+        return style
+
+    def render(self, filename, report, progress=None, options=default_options):
+        # report: ReportData from reports.report_data; progress(page) is called
+        # as each page begins and may raise to abandon the render (nothing is
+        # written until the last page is done)
+        doc = SimpleDocTemplate(filename, pagesize=letter, leftMargin=40, rightMargin=40, topMargin=50, bottomMargin=40)
+        elements = []
+        logo_forms = set()
+
+        # --- onFirstPage and onLaterPages callbacks ---
+        def draw_header_and_logo(canvas, doc):
+            width, height = letter
+            margin = 40
+            draw_report_header(canvas, margin, height - margin, width - margin, report.settings, report.report_range, report.date_start, report.date_end, options, logo_forms)
+            if progress:
+                progress(doc.page)
+
+        def draw_nothing(canvas, doc):
+            if progress:
+                progress(doc.page)
+
+        elements.append(Spacer(1, 90))  # Space below header/logo
+        elements.extend(self.build_story(report))
+        doc.build(elements, onFirstPage=draw_header_and_logo, onLaterPages=draw_nothing)
+
+    def build_story(self, report):
+        # Table and summary flowables for one week
+        elements = []
+        summary = report.summary
+
+        # --- Uniform font size logic ---
+        # Fit the summary first, then give the table whatever is left of the
+        # first page, measured with real glyph widths
+        summary_size = fit_text_font(summary, self.font_name, self.summary_width, self.summary_max_height)
+        summary_height = text_height(summary, self.font_name, summary_size, self.summary_width)
+        table_max_height = self.first_page_height - self.fixed_height - min(summary_height, self.summary_max_height)
+        rows = [[day, general] + list(cells) for day, general, cells in report.rows]
+        if report.totals is not None and rows:
+            rows.append(['Total', ''] + list(report.totals))
+        uniform_font_size = fit_table_font(rows, self.text_widths, self.font_name, table_max_height)
+        cell_style = self.sized_style(uniform_font_size, leading_for(uniform_font_size))
+
+        # Table header
+        table_data = [[Paragraph(label, self.bold_style) for label in self.header_labels]]
+
+        # Table rows; cell text is plain, so escape it once for Paragraph markup
+        for row in rows:
+            table_data.append([Paragraph(escape(text, quote=False).replace('\n', '<br/>'), cell_style) for text in row])
+
+        table = Table(table_data, colWidths=self.col_widths, repeatRows=1)
+        table.setStyle(self.totals_style if report.totals is not None and rows else self.table_style)
+        elements.append(table)
+        elements.append(Spacer(1, 16))
+
+        # Summary/comments section
+        elements.append(Paragraph("<b>Summary/Comments:</b>", self.bold_style))
+        sum_style = self.sized_style(summary_size, leading_for(summary_size))
+        elements.append(Paragraph(escape(summary, quote=False).replace('\n', '<br/>'), sum_style))
+        return elements
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+def get_report_template(column_names=(), totals_row=False):
+    key = (tuple(column_names), bool(totals_row))
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is None:
+            template = ReportTemplate(*key)
+            _templates[key] = template
+        return template
+
+# Bump whenever the layout changes, so cached PDFs from older code are not reused
+generator_version = 2
+
+def write_pdf_report(filename, report, progress=None, use_cache=True, options=default_options):
+    # Returns True when an identical earlier render was copied from the PDF
+    # cache instead of being laid out again. Only file paths are cached.
+    key = None
+    if use_cache and pdf_cache.enabled and isinstance(filename, str):
+        try:
+            key = pdf_cache.report_key(report, generator_version, options)
+            if pdf_cache.fetch(key, filename):
+                return True
+        except OSError:
+            key = None
+    template = get_report_template(report.column_names, report.totals is not None)
+    with render_lock:
+        template.render(filename, report, progress, options)
+    if key is not None:
+        try:
+            pdf_cache.store(key, filename)
+        except OSError:
+            pass
+    return False
 
 def generate_pdf_report(filename, settings, week_data, summary, report_range, date_start, date_end, additional_field=None, additional_subfields=None):
-    if additional_field is None:
-        additional_field = settings.get('additional_field', '').strip()
-    if additional_subfields is None:
-        additional_subfields = settings.get('additional_subfields', [])
+    write_pdf_report(filename, collect_report(settings, week_data, summary, report_range, date_start, date_end, additional_field, additional_subfields))
+
+def pdf_size(render):
+    # Bytes written by render(file) into memory, for size comparisons
+    buffer = io.BytesIO()
+    render(buffer)
+    return len(buffer.getvalue())
+
+def generate_rollup_report(filename, weeks, progress=None, options=default_options):
+    # Render many saved weeks (dicts in the save_data shape, e.g. from
+    # HistoryStore.iter_weeks) into one PDF, one week per section.
+    # progress(page_number, weeks_started) is called as each page begins.
+    state = {'weeks': 0, 'pages': 0}
+    logo_forms = set()
+
+    def week_chunks():
+        for week in weeks:
+            report = collect_week(week)
+            template = get_report_template(report.column_names, report.totals is not None)
+            chunk = [PageBreak()] if state['weeks'] else []
+            chunk.append(WeekHeader(report.settings, report.report_range, report.date_start, report.date_end, options, logo_forms))
+            chunk.extend(template.build_story(report))
+            state['weeks'] += 1
+            yield chunk
 
-    from reportlab.platypus import Image
-    from reportlab.lib.units import inch
+    def page_done(canvas, doc):
+        state['pages'] += 1
+        if progress:
+            progress(state['pages'], state['weeks'])
 
     doc = SimpleDocTemplate(filename, pagesize=letter, leftMargin=40, rightMargin=40, topMargin=50, bottomMargin=40)
-    elements = []
-    styles = getSampleStyleSheet()
-    normal_style = styles["Normal"]
-    normal_style.fontName = "Helvetica"
-    normal_style.fontSize = 11
-    normal_style.leading = 14
-    normal_style.wordWrap = 'CJK'
-    bold_style = styles["Heading4"]
-    bold_style.fontName = "Helvetica-Bold"
-    bold_style.fontSize = 14
-    bold_style.leading = 16
-    header_style = ParagraphStyle('header', parent=styles['Heading1'], fontName='Helvetica-Bold', fontSize=18, leading=22, alignment=TA_LEFT)
-    subheader_style = ParagraphStyle('subheader', parent=styles['Heading2'], fontName='Helvetica-Bold', fontSize=12, leading=16, alignment=TA_LEFT)
-
-    # --- onFirstPage and onLaterPages callbacks ---
-    def draw_header_and_logo(canvas, doc):
-        width, height = letter
-        margin = 40
-        text_left = margin
-        logo_width = 1.2 * inch
-        logo_height = 0.7 * inch
-        logo_x = width - logo_width - margin
-        logo_y = height - logo_height - margin + 10
-        # Draw logo at top right
-        logo_path = settings.get('logo')
-        if logo_path and os.path.exists(logo_path):
-            try:
-                canvas.drawImage(logo_path, logo_x, logo_y, width=logo_width, height=logo_height, preserveAspectRatio=True, mask='auto')
-            except Exception:
-                pass
-        # Draw header text at top left
-        y = height - margin
-        canvas.setFont("Helvetica-Bold", 18)
-        canvas.drawString(text_left, y, "Weekly Report")
-        y -= 24
-        canvas.setFont("Helvetica-Bold", 12)
-        canvas.drawString(text_left, y, f"Report Range: {report_range} ({date_start} to {date_end})")
-        y -= 18
-        canvas.setFont("Helvetica", 12)
-        canvas.drawString(text_left, y, f"Name: {settings.get('name', '')}")
-        y -= 16
-        canvas.drawString(text_left, y, f"Agency: {settings.get('agency', '')}")
-        y -= 16
-        canvas.drawString(text_left, y, f"Location: {settings.get('location', '')}")
-        y -= 12
-        canvas.setStrokeColor(colors.grey)
-        canvas.line(margin, y, width-margin, y)
-
-    def draw_nothing(canvas, doc):
-        pass
-
-    elements.append(Spacer(1, 90))  # Space below header/logo
-
-    # --- Uniform font size logic ---
-    # Find the minimum font size needed for all day names (e.g., Wednesday)
-    min_day_font_size = 11
-    for day in week_data.keys():
-        if len(day) > 8:
-            min_day_font_size = min(min_day_font_size, 9)
-    # Optionally, you can set a lower bound if you want even smaller for very long names
-    # Find the minimum font size needed for all general/additional fields
-    min_data_font_size = 11
-    for daydata in week_data.values():
-        general = daydata.get('general', '')
-        if len(general) > 300:
-            min_data_font_size = min(min_data_font_size, 8)
-        elif len(general) > 150:
-            min_data_font_size = min(min_data_font_size, 9)
-        additional = daydata.get('additional', {})
-        for val in additional.values():
-            val = str(val)
-            if len(val) > 100:
-                min_data_font_size = min(min_data_font_size, 8)
-            elif len(val) > 50:
-                min_data_font_size = min(min_data_font_size, 9)
-    # Use the smallest font size needed for all table cells (day, general, additional)
-    uniform_font_size = min(min_day_font_size, min_data_font_size)
-    uniform_leading = 10 if uniform_font_size <= 8 else (12 if uniform_font_size == 9 else 14)
-
-    # Table header
-    table_data = []
-    header_row = [Paragraph('<b>Day</b>', bold_style), Paragraph('<b>General Notes</b>', bold_style)]
-    for sub in additional_subfields:
-        header_row.append(Paragraph(f'<b>{sub}</b>', bold_style))
-    table_data.append(header_row)
-
-    # Table rows
-    for day, daydata in week_data.items():
-        day_style = ParagraphStyle('day', parent=normal_style)
-        day_style.fontSize = uniform_font_size
-        day_style.leading = uniform_leading
-        row = [Paragraph(day, day_style)]
-        general = daydata.get('general', '')
-        gen_style = ParagraphStyle('gen', parent=normal_style)
-        gen_style.fontSize = uniform_font_size
-        gen_style.leading = uniform_leading
-        row.append(Paragraph(general.replace('\n', '<br/>'), gen_style))
-        additional = daydata.get('additional', {})
-        for sub in additional_subfields:
-            val = str(additional.get(sub, ''))
-            sub_style = ParagraphStyle('sub', parent=normal_style)
-            sub_style.fontSize = uniform_font_size
-            sub_style.leading = uniform_leading
-            row.append(Paragraph(val.replace('\n', '<br/>'), sub_style))
-        table_data.append(row)
-
-    # Table style
-    # Make day column wider (80), general notes (190), subfields (90 each)
-    col_widths = [80, 190] + [90 for _ in additional_subfields]
-    table = Table(table_data, colWidths=col_widths, repeatRows=1)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.black),
-        ('ALIGN', (0,0), (-1,-1), 'LEFT'),
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,0), 13),
-        ('BOTTOMPADDING', (0,0), (-1,0), 8),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('LEFTPADDING', (0,0), (-1,-1), 6),
-        ('RIGHTPADDING', (0,0), (-1,-1), 6),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-    ]))
-    elements.append(table)
-    elements.append(Spacer(1, 16))
-
-    # Summary/comments section
-    elements.append(Paragraph("<b>Summary/Comments:</b>", bold_style))
-    sum_style = ParagraphStyle('sum', parent=normal_style)
-    sum_style.fontSize = 11
-    sum_style.leading = 14
-    if len(summary) > 600:
-        sum_style.fontSize = 8
-        sum_style.leading = 10
-    elif len(summary) > 300:
-        sum_style.fontSize = 9
-        sum_style.leading = 12
-    elements.append(Paragraph(summary.replace('\n', '<br/>'), sum_style))
-
-    doc.build(elements, onFirstPage=draw_header_and_logo, onLaterPages=draw_nothing)
+    with render_lock:
+        doc.build(FlowableStream(week_chunks()), onFirstPage=page_done, onLaterPages=page_done)
+    return state['pages']
@@ -0,0 +1,41 @@
+from collections import namedtuple
+from data.fields import report_columns, total_columns, week_table, format_row
+
+# The one data-collection step shared by the PDF and rich text outputs: the
+# table columns, each day's cells as display text, the totals row and the
+# header fields. Values are plain (unescaped) text; each renderer escapes
+# them once for its own markup.
+
+ReportData = namedtuple('ReportData', 'settings report_range date_start date_end column_names rows totals summary')
+
+def collect_report(settings, week_data, summary, report_range, date_start, date_end, additional_field=None, additional_subfields=None):
+    if additional_field is None:
+        additional_field = settings.get('additional_field', '').strip()
+    if additional_subfields is None:
+        additional_subfields = settings.get('additional_subfields', [])
+    # Subfield columns only appear with an additional field name, as in the window
+    columns = report_columns(settings, additional_subfields) if additional_field else ()
+    totals_for = total_columns(settings, columns)
+    values, totals = week_table(week_data, columns, totals_for)
+    rows = tuple(
+        (day, daydata.get('general', ''), tuple(format_row(columns, day_values)))
+        for (day, daydata), day_values in zip(week_data.items(), values)
+    )
+    return ReportData(
+        settings=settings,
+        report_range=report_range,
+        date_start=date_start,
+        date_end=date_end,
+        column_names=tuple(column.name for column in columns),
+        rows=rows,
+        totals=tuple(format_row(columns, totals)) if totals_for else None,
+        summary=summary,
+    )
+
+def collect_week(week):
+    # ReportData for a stored week (the save_data shape, e.g. from iter_weeks)
+    from data.storage import get_week_data
+    settings = week.get('settings', {})
+    date_start, date_end = (list(week.get('date_range') or []) + ['', ''])[:2]
+    report_range = week.get('report_range', settings.get('report_range', 'Monday–Friday'))
+    return collect_report(settings, get_week_data(week), week.get('summary', ''), report_range, date_start, date_end)
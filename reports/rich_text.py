@@ -0,0 +1,91 @@
+import re
+from html import escape
+from reports.report_data import collect_report, collect_week
+
+# Rich text (HTML) version of the weekly report, for pasting into email.
+# Kept free of Qt so it can be used headless.
+#
+# The markup lives in small templates compiled once at import. Every value is
+# escaped exactly once as it is written, and output goes to a `write`
+# callable (list.append, file.write), so a rollup of any length is built in
+# linear time and joined at the end or streamed to disk.
+
+class Template:
+    # "{name}" is escaped, "{name|br}" is escaped with newlines as <br>,
+    # "{name|raw}" is inserted as is (already markup)
+    _field = re.compile(r"\{(\w+)(?:\|(br|raw))?\}")
+
+    def __init__(self, source):
+        self.parts = []
+        pos = 0
+        for match in self._field.finditer(source):
+            self.parts.append((source[pos:match.start()], match.group(1), match.group(2)))
+            pos = match.end()
+        self.tail = source[pos:]
+
+    def render(self, write, values):
+        for literal, name, kind in self.parts:
+            write(literal)
+            value = str(values[name])
+            if kind == 'raw':
+                write(value)
+            elif kind == 'br':
+                write(escape(value, quote=False).replace('\n', '<br>'))
+            else:
+                write(escape(value, quote=False))
+        write(self.tail)
+
+header_template = Template("""
+<h2>Weekly Report</h2>
+<b>Report Range:</b> {report_range} ({date_start} to {date_end})<br>
+<b>Name:</b> {name}<br>
+<b>Agency:</b> {agency}<br>
+<b>Location:</b> {location}<br><br>
+<table border='1' cellpadding='4' cellspacing='0'>
+<tr><th>Day</th><th>General Notes</th>""")
+column_header_template = Template("<th>{name}</th>")
+row_template = Template("<tr><td>{day}</td><td>{general|br}</td>")
+cell_template = Template("<td>{text}</td>")
+total_cell_template = Template("<td><b>{text}</b></td>")
+summary_template = Template("</table><br><b>Summary/Comments:</b><br>{summary|br}")
+week_break = "<hr>"
+
+def write_rich_text(write, report):
+    # report: ReportData from reports.report_data
+    settings = report.settings
+    header_template.render(write, {
+        'report_range': report.report_range, 'date_start': report.date_start, 'date_end': report.date_end,
+        'name': settings.get('name', ''), 'agency': settings.get('agency', ''), 'location': settings.get('location', ''),
+    })
+    for name in report.column_names:
+        column_header_template.render(write, {'name': name})
+    write("</tr>\n")
+    for day, general, cells in report.rows:
+        row_template.render(write, {'day': day, 'general': general})
+        for text in cells:
+            cell_template.render(write, {'text': text})
+        write("</tr>\n")
+    if report.totals is not None:
+        write("<tr><td><b>Total</b></td><td></td>")
+        for text in report.totals:
+            total_cell_template.render(write, {'text': text})
+        write("</tr>\n")
+    summary_template.render(write, {'summary': report.summary})
+
+def render_rich_text(report):
+    parts = []
+    write_rich_text(parts.append, report)
+    return ''.join(parts)
+
+def build_rich_text_html(settings, week_data, summary, report_range, date_start, date_end, additional_field=None, additional_subfields=None):
+    return render_rich_text(collect_report(settings, week_data, summary, report_range, date_start, date_end, additional_field, additional_subfields))
+
+def write_rich_text_rollup(write, weeks):
+    # Stored weeks (e.g. from iter_weeks), one section each; returns the count
+    count = 0
+    for week in weeks:
+        if count:
+            write(week_break)
+        write_rich_text(write, collect_week(week))
+        count += 1
+    return count
@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import argparse
+from datetime import date, timedelta
+from data.storage import iter_weeks
+from reports.pdf_generator import compact_options, default_options, generate_rollup_report, pdf_size
+from reports.rich_text import write_rich_text_rollup
+
+# Monthly / quarterly rollups from the history store:
+#   python -m reports.rollup --month 2026-09 -o September.pdf
+#   python -m reports.rollup --quarter 2026Q3 -o Q3.pdf
+#   python -m reports.rollup --from 2026-01-01 --to 2026-06-30 -o H1.pdf
+#   python -m reports.rollup --month 2026-09 -o September.html   (rich text for email)
+
+def month_bounds(value):
+    # ValueError for anything but YYYY-MM with a month from 1 to 12
+    parts = value.split('-')
+    if len(parts) != 2 or not all(part.isdigit() for part in parts) or not 1 <= int(parts[1]) <= 12:
+        raise ValueError(f"expected a month as YYYY-MM, got {value!r}")
+    year, month = (int(part) for part in parts)
+    start = date(year, month, 1)
+    end = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return start.isoformat(), end.isoformat()
+
+def quarter_bounds(value):
+    # ValueError for anything but YYYYQn with n from 1 to 4
+    parts = value.upper().split('Q')
+    if len(parts) != 2 or not parts[0].isdigit() or parts[1] not in ('1', '2', '3', '4'):
+        raise ValueError(f"expected a quarter as YYYYQn with n from 1 to 4, got {value!r}")
+    year, quarter = parts
+    first_month = (int(quarter) - 1) * 3 + 1
+    start, _ = month_bounds(f"{year}-{first_month}")
+    _, end = month_bounds(f"{year}-{first_month + 2}")
+    return start, end
+
+def check_date(value):
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"expected a date as YYYY-MM-DD, got {value!r}") from None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m reports.rollup', description="Render saved weeks from the history store into one PDF or rich text (.html) file.")
+    span = parser.add_mutually_exclusive_group(required=True)
+    span.add_argument('--month', help="YYYY-MM")
+    span.add_argument('--quarter', help="YYYYQn, e.g. 2026Q3")
+    span.add_argument('--from', dest='date_from', help="First date (YYYY-MM-DD); use with --to")
+    parser.add_argument('--to', dest='date_to', help="Last date (YYYY-MM-DD)")
+    parser.add_argument('-o', '--output', required=True, help="PDF file to write, or .html/.htm for rich text")
+    parser.add_argument('--compact', action='store_true', help="Smaller PDF for archiving and email: lower-resolution logo")
+    parser.add_argument('--dpi', type=int, default=None, help=f"Logo resolution with --compact (default: {compact_options.logo_dpi})")
+    parser.add_argument('--compare', action='store_true', help="Also measure the PDF with the default full-resolution logo and print before/after sizes")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.month:
+            date_from, date_to = month_bounds(args.month)
+        elif args.quarter:
+            date_from, date_to = quarter_bounds(args.quarter)
+        else:
+            date_from, date_to = args.date_from, args.date_to or date.today().isoformat()
+            for value in (date_from, date_to):
+                check_date(value)
+    except ValueError as e:
+        parser.error(str(e))
+
+    def progress(pages, weeks):
+        print(f"\rpage {pages}, week {weeks}", end='', flush=True)
+
+    start = time.perf_counter()
+    if args.output.lower().endswith(('.html', '.htm')):
+        # Streamed straight to the file, one week at a time
+        with open(args.output, 'w', encoding='utf-8') as f:
+            weeks = write_rich_text_rollup(f.write, iter_weeks(date_from, date_to))
+        print(f"{weeks} weeks for {date_from} to {date_to} written to {args.output} in {time.perf_counter() - start:.2f} s")
+        return 0
+    options = default_options
+    if args.compact:
+        options = compact_options._replace(logo_dpi=args.dpi or compact_options.logo_dpi)
+    pages = generate_rollup_report(args.output, iter_weeks(date_from, date_to), progress, options)
+    print(f"\n{pages} pages for {date_from} to {date_to} written to {args.output} in {time.perf_counter() - start:.2f} s")
+    size = os.path.getsize(args.output)
+    if args.compare:
+        before = pdf_size(lambda f: generate_rollup_report(f, iter_weeks(date_from, date_to)))
+        print(f"{before / 1024:.1f} KiB with the full-resolution logo -> {size / 1024:.1f} KiB ({1 - size / before:.0%} smaller)")
+    else:
+        print(f"{size / 1024:.1f} KiB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
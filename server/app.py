@@ -0,0 +1,203 @@
+import io
+import sys
+import hmac
+import json
+import zlib
+import argparse
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+from server.team_store import TeamStore
+
+# Optional team collection server. Staff POST the same week document that
+# MainWindow.save_all_data writes; the server files it by the name in its
+# settings and serves merged team rollups through the PDF generator.
+#
+#   python -m server.app --db team.db --port 8765 [--token SECRET]
+#
+#   POST /api/weeks                      week JSON -> 201 {member, date_range, days_written}
+#   POST /api/sync                       {member, weeks: [delta, ...]} from data.sync -> {results}
+#   GET  /api/weeks?from=&to=&member=    list of stored weeks
+#   GET  /api/weeks/<member>/<start>/<end>
+#   GET  /api/rollup.pdf?from=&to=&member=
+#   GET  /api/health
+
+# Limit on a request body, before and after gzip decompression
+max_body = 5 * 1024 * 1024
+
+class BodyTooLarge(ValueError):
+    pass
+
+def gunzip(payload, limit=None):
+    # Decompresses a gzip body in bounded steps, so a small upload cannot
+    # expand past `limit` bytes in memory
+    limit = max_body if limit is None else limit
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    chunks, size = [], 0
+    while not decompressor.eof:
+        try:
+            chunk = decompressor.decompress(payload, 64 * 1024)
+        except zlib.error as e:
+            raise ValueError(f"bad gzip body: {e}") from None
+        payload = decompressor.unconsumed_tail
+        if not chunk and not payload:
+            raise ValueError("truncated gzip body")
+        size += len(chunk)
+        if size > limit:
+            raise BodyTooLarge(f"body must be at most {limit} bytes uncompressed")
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+class TeamServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Many clients submit at the start of the week; the default backlog is 5
+    request_queue_size = 128
+
+    def __init__(self, address, store, token=None, quiet=False):
+        super().__init__(address, TeamRequestHandler)
+        self.store = store
+        self.token = token
+        self.quiet = quiet
+
+class TeamRequestHandler(BaseHTTPRequestHandler):
+    server_version = "WrapUpTeam/1.0"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def send_json(self, status, value):
+        body = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        self.send_json(status, {'error': message})
+
+    def authorized(self):
+        if not self.server.token:
+            return True
+        expected = f"Bearer {self.server.token}".encode('utf-8')
+        if hmac.compare_digest(self.headers.get('Authorization', '').encode('utf-8'), expected):
+            return True
+        self.send_error_json(HTTPStatus.UNAUTHORIZED, "missing or wrong token")
+        return False
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            raise ValueError("body is empty")
+        if length > max_body:
+            self.close_connection = True
+            raise BodyTooLarge(f"body must be at most {max_body} bytes")
+        payload = self.rfile.read(length)
+        if self.headers.get('Content-Encoding', '') == 'gzip':
+            payload = gunzip(payload)
+        data = json.loads(payload.decode('utf-8'))
+        if not isinstance(data, dict):
+            raise ValueError("body must be a JSON object")
+        return data
+
+    def do_POST(self):
+        if not self.authorized():
+            return
+        path = urlsplit(self.path).path
+        if path == '/api/sync':
+            return self.receive_sync()
+        if path != '/api/weeks':
+            return self.send_error_json(HTTPStatus.NOT_FOUND, "not found")
+        try:
+            member, date_range, written = self.server.store.submit(self.read_json())
+        except BodyTooLarge as e:
+            return self.send_error_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, str(e))
+        except (ValueError, UnicodeDecodeError, OSError) as e:
+            return self.send_error_json(HTTPStatus.BAD_REQUEST, str(e))
+        self.send_json(HTTPStatus.CREATED, {'member': member, 'date_range': date_range, 'days_written': written})
+
+    def receive_sync(self):
+        # Batched week deltas (only changed days and fields) from data.sync
+        try:
+            batch = self.read_json()
+            member = str(batch.get('member', '')).strip()
+            if not member:
+                raise ValueError("member is required")
+            weeks = batch.get('weeks', [])
+            if not isinstance(weeks, list):
+                raise ValueError("weeks must be a list")
+            results = [{'date_range': delta.get('date_range') if isinstance(delta, dict) else None,
+                        'status': self.server.store.apply_delta(member, delta)}
+                       for delta in weeks]
+        except BodyTooLarge as e:
+            return self.send_error_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, str(e))
+        except (ValueError, KeyError, TypeError, UnicodeDecodeError, OSError) as e:
+            return self.send_error_json(HTTPStatus.BAD_REQUEST, str(e))
+        self.send_json(HTTPStatus.OK, {'results': results})
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split('/') if p]
+        store = self.server.store
+        if parts == ['api', 'health']:
+            return self.send_json(HTTPStatus.OK, {'ok': True})
+        if parts == ['api', 'weeks']:
+            weeks = store.list_weeks(query.get('from'), query.get('to'), query.get('member'))
+            return self.send_json(HTTPStatus.OK, [
+                {'member': m, 'date_range': [s, e], 'updated': u} for m, s, e, u in weeks])
+        if len(parts) == 5 and parts[:2] == ['api', 'weeks']:
+            week = store.load_week(unquote(parts[2]), parts[3], parts[4])
+            if week is None:
+                return self.send_error_json(HTTPStatus.NOT_FOUND, "no such week")
+            return self.send_json(HTTPStatus.OK, week)
+        if parts == ['api', 'rollup.pdf']:
+            return self.send_rollup(query)
+        self.send_error_json(HTTPStatus.NOT_FOUND, "not found")
+
+    def send_rollup(self, query):
+        # Every member's weeks in the span, ordered by date then member, as one PDF
+        from reports.pdf_generator import generate_rollup_report
+        weeks = self.server.store.iter_weeks(query.get('from'), query.get('to'), query.get('member'))
+        buffer = io.BytesIO()
+        # One rollup at a time; see reports.pdf_generator.render_lock
+        pages = generate_rollup_report(buffer, weeks)
+        body = buffer.getvalue()
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Pages', str(pages))
+        self.end_headers()
+        self.wfile.write(body)
+
+def make_server(db_path, host='127.0.0.1', port=8765, token=None, pool_size=8, quiet=False):
+    # Port 0 picks a free port (server.server_address[1]); handy for local testing
+    return TeamServer((host, port), TeamStore(db_path, pool_size), token, quiet)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m server.app', description="Collect weekly reports from a team and serve merged rollups.")
+    parser.add_argument('--db', default='team_reports.db', help="SQLite database file (default: team_reports.db)")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="Port (default: 8765)")
+    parser.add_argument('--token', help="Require 'Authorization: Bearer TOKEN' on every request")
+    parser.add_argument('--pool', type=int, default=8, help="Database connections to keep open (default: 8)")
+    parser.add_argument('--quiet', action='store_true', help="Do not log requests")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.db, args.host, args.port, args.token, args.pool, args.quiet)
+    host, port = server.server_address[:2]
+    print(f"Serving team reports from {args.db} on http://{host}:{port}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.store.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
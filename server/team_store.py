@@ -0,0 +1,216 @@
+import json
+import time
+import queue
+import sqlite3
+from contextlib import contextmanager
+from data.storage import get_week_data
+
+# Shared team database for the collection server: every member's weeks, keyed
+# by (member, date_start, date_end), in the same day-per-row layout as the
+# local history store. Connections come from a fixed pool so concurrent
+# submissions do not open a database connection per request.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weeks (
+    member TEXT NOT NULL,
+    date_start TEXT NOT NULL,
+    date_end TEXT NOT NULL,
+    report_range TEXT NOT NULL DEFAULT '',
+    summary TEXT NOT NULL DEFAULT '',
+    settings TEXT NOT NULL DEFAULT '{}',
+    updated REAL NOT NULL,
+    PRIMARY KEY (member, date_start, date_end)
+);
+CREATE TABLE IF NOT EXISTS days (
+    member TEXT NOT NULL,
+    date_start TEXT NOT NULL,
+    date_end TEXT NOT NULL,
+    day TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    general TEXT NOT NULL DEFAULT '',
+    additional TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (member, date_start, date_end, day)
+);
+CREATE INDEX IF NOT EXISTS team_weeks_by_date ON weeks (date_start, date_end);
+"""
+
+# The only settings kept for a week: the header fields and the table layout
+# the rollup renders. Anything else a client sends (local paths, tokens) is
+# not stored or served back.
+shown_settings = ('name', 'agency', 'location', 'report_range', 'additional_field', 'additional_subfields',
+                  'subfield_types', 'computed_columns', 'total_columns')
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+def member_of(data):
+    # Weeks are filed under the submitter's name from their settings
+    settings = data.get('settings', {})
+    if not isinstance(settings, dict):
+        raise ValueError("settings must be an object")
+    return str(settings.get('name', '')).strip()
+
+def _check_week(data):
+    if not isinstance(data, dict):
+        raise ValueError("a week must be a JSON object")
+    date_range = data.get('date_range')
+    if not isinstance(date_range, list) or len(date_range) != 2:
+        raise ValueError("date_range must be [start, end]")
+    if not isinstance(data.get('settings', {}), dict):
+        raise ValueError("settings must be an object")
+    for key in ('summary', 'report_range'):
+        if not isinstance(data.get(key, ''), str):
+            raise ValueError(f"{key} must be a string")
+    for day, daydata in get_week_data(data).items():
+        if not isinstance(daydata.get('general', ''), str) or not isinstance(daydata.get('additional', {}), dict):
+            raise ValueError(f"{day}: general must be a string and additional an object")
+
+class ConnectionPool:
+    def __init__(self, path, size=8):
+        self.path = path
+        self._idle = queue.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._idle.put(conn)
+        self.size = size
+
+    @contextmanager
+    def connection(self):
+        # Blocks until a connection is free; commits on success
+        conn = self._idle.get()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        for _ in range(self.size):
+            self._idle.get().close()
+
+class TeamStore:
+    def __init__(self, path, pool_size=8):
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def close(self):
+        self.pool.close()
+
+    def submit(self, data, member=None):
+        # Stores one week in the save_data shape; returns (member, date_range,
+        # days written). Only days that changed are rewritten.
+        _check_week(data)
+        member = member or member_of(data)
+        if not member:
+            raise ValueError("settings.name is required")
+        with self.pool.connection() as conn:
+            # Take the write lock up front so concurrent submissions of the
+            # same week serialize instead of failing mid-transaction
+            conn.execute("BEGIN IMMEDIATE")
+            written = self._write_week(conn, member, data)
+        return member, [str(d) for d in data['date_range']], written
+
+    def _write_week(self, conn, member, data):
+        date_start, date_end = (str(d) for d in data['date_range'])
+        week_data = get_week_data(data)
+        key = (member, date_start, date_end)
+        stored = {
+            day: (position, general, additional)
+            for day, position, general, additional in conn.execute(
+                "SELECT day, position, general, additional FROM days WHERE member=? AND date_start=? AND date_end=?", key)
+        }
+        changed = []
+        for position, (day, daydata) in enumerate(week_data.items()):
+            row = (position, daydata.get('general', ''), _dumps(daydata.get('additional', {})))
+            if stored.get(day) != row:
+                changed.append(key + (day,) + row)
+        conn.executemany(
+            "INSERT OR REPLACE INTO days (member, date_start, date_end, day, position, general, additional) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            changed)
+        conn.executemany("DELETE FROM days WHERE member=? AND date_start=? AND date_end=? AND day=?",
+                         [key + (day,) for day in stored if day not in week_data])
+        conn.execute(
+            "INSERT OR REPLACE INTO weeks (member, date_start, date_end, report_range, summary, settings, updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            key + (data.get('report_range', ''), data.get('summary', ''), _dumps({name: value for name, value in data.get('settings', {}).items() if name in shown_settings}), time.time()))
+        return len(changed)
+
+    def apply_delta(self, member, delta):
+        # Merges a week delta from data.sync into the stored week. Returns
+        # 'ok', or 'missing' when the delta builds on a week this store does
+        # not have (the client then resends it whole).
+        if not isinstance(delta, dict):
+            raise ValueError("a week delta must be a JSON object")
+        date_range = delta.get('date_range')
+        if not isinstance(date_range, list) or len(date_range) != 2:
+            raise ValueError("date_range must be [start, end]")
+        if not isinstance(delta.get('days', {}), dict) or not all(isinstance(f, dict) for f in delta.get('days', {}).values()):
+            raise ValueError("days must map day names to objects")
+        if not isinstance(delta.get('removed', []), list) or not isinstance(delta.get('order', []), list):
+            raise ValueError("removed and order must be lists")
+        date_start, date_end = (str(d) for d in date_range)
+        with self.pool.connection() as conn:
+            # Read, merge and write in one transaction, so two deltas for the
+            # same week apply one after the other instead of both merging
+            # into the same old row
+            conn.execute("BEGIN IMMEDIATE")
+            week = None if delta.get('full') else self._read_week(conn, (member, date_start, date_end))
+            if week is None and not delta.get('full'):
+                return 'missing'
+            week = week or {'settings': {}}
+            days = get_week_data(week)
+            for day, fields in delta.get('days', {}).items():
+                daydata = dict(days.get(day) or {'general': '', 'additional': {}})
+                if 'general' in fields:
+                    daydata['general'] = fields['general']
+                if fields.get('replace'):
+                    daydata['additional'] = fields.get('additional', {})
+                elif 'additional' in fields:
+                    daydata['additional'] = {**daydata.get('additional', {}), **fields['additional']}
+                days[day] = daydata
+            for day in delta.get('removed', []):
+                days.pop(day, None)
+            order = [day for day in delta.get('order', []) if day in days]
+            merged = {day: days[day] for day in order + [day for day in days if day not in order]}
+            for key in ('summary', 'settings', 'report_range'):
+                merged[key] = delta.get(key, week.get(key, {} if key == 'settings' else ''))
+            merged['date_range'] = [date_start, date_end]
+            _check_week(merged)
+            self._write_week(conn, member, merged)
+        return 'ok'
+
+    def list_weeks(self, date_from=None, date_to=None, member=None):
+        # [(member, date_start, date_end, updated)] ordered by date, then member
+        sql = "SELECT member, date_start, date_end, updated FROM weeks WHERE date_end >= ? AND date_start <= ?"
+        params = [date_from or '', date_to or '9999-12-31']
+        if member:
+            sql += " AND member=?"
+            params.append(member)
+        with self.pool.connection() as conn:
+            return [tuple(r) for r in conn.execute(sql + " ORDER BY date_start, member", params)]
+
+    def load_week(self, member, date_start, date_end):
+        with self.pool.connection() as conn:
+            return self._read_week(conn, (member, date_start, date_end))
+
+    def _read_week(self, conn, key):
+        member, date_start, date_end = key
+        row = conn.execute(
+            "SELECT report_range, summary, settings FROM weeks WHERE member=? AND date_start=? AND date_end=?", key).fetchone()
+        if row is None:
+            return None
+        days = conn.execute(
+            "SELECT day, general, additional FROM days WHERE member=? AND date_start=? AND date_end=? ORDER BY position", key).fetchall()
+        report_range, summary, settings = row
+        week = {day: {'general': general, 'additional': json.loads(additional)} for day, general, additional in days}
+        week.update(summary=summary, settings=json.loads(settings), report_range=report_range, date_range=[date_start, date_end])
+        return week
+
+    def iter_weeks(self, date_from=None, date_to=None, member=None):
+        # One week at a time, so rollups of the whole team stay small in memory
+        for member, date_start, date_end, _ in self.list_weeks(date_from, date_to, member):
+            week = self.load_week(member, date_start, date_end)
+            if week is not None:
+                yield week
@@ -0,0 +1,16 @@
+import pytest
+from data import history, storage
+
+@pytest.fixture
+def isolated_storage(tmp_path, monkeypatch):
+    # The current-week file and history store under tmp_path, with an empty cache
+    monkeypatch.setattr(storage, 'data_file', str(tmp_path / 'data.json'))
+    monkeypatch.setattr(storage, '_cache', {'key': None, 'data': None, 'pending': False, 'generation': 0})
+    monkeypatch.setattr(storage, '_writer', dict(storage._writer, queued=None, busy=False, error=None))
+    monkeypatch.setattr(storage, '_error_handler', [None])
+    monkeypatch.setattr(history, 'history_file', str(tmp_path / 'history.db'))
+    monkeypatch.setattr(history, '_store', None)
+    yield tmp_path
+    storage.flush()
+    if history._store is not None:
+        history._store.close()
@@ -0,0 +1,115 @@
+import os
+import pytest
+from data import archive
+from data.archive import ArchiveError, WeekArchive
+
+def make_week(date_start, date_end, note='', agency='North'):
+    return {
+        'date_range': [date_start, date_end],
+        'settings': {'agency': agency},
+        'summary': note,
+        f'Monday {date_start}': {'general': note, 'additional': {'Miles': '12'}},
+        f'Tuesday {date_end}': {'general': '', 'additional': {}},
+    }
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'weeks.wrarc')
+
+def test_round_trip(path):
+    weeks = [make_week('2025-03-10', '2025-03-16', 'b'), make_week('2025-03-03', '2025-03-09', 'a')]
+    store = WeekArchive(path)
+    assert store.add_weeks(weeks) == 2
+    store.close()
+    store = WeekArchive(path)
+    assert store.list_weeks() == [('2025-03-03', '2025-03-09'), ('2025-03-10', '2025-03-16')]
+    assert store.load_week('2025-03-10', '2025-03-16') == weeks[0]
+    assert store.load_week('2025-03-05') == weeks[1]
+    assert store.load_week('2025-03-17') is None
+    assert store.load_week('2025-03-01') is None
+    assert [week['summary'] for week in store.iter_weeks()] == ['a', 'b']
+    assert [week['summary'] for week in store.iter_weeks('2025-03-10')] == ['b']
+    assert [week['summary'] for week in store.iter_weeks(date_to='2025-03-09')] == ['a']
+
+def test_replaced_week_is_packed_away(path):
+    store = WeekArchive(path)
+    store.add_weeks([make_week('2025-03-03', '2025-03-09', 'old')])
+    assert store.dead_bytes() == 0
+    store.add_weeks([make_week('2025-03-03', '2025-03-09', 'new')])
+    assert len(store) == 1
+    assert store.dead_bytes() > 0
+    assert WeekArchive(path).load_week('2025-03-04')['summary'] == 'new'
+    store.pack()
+    assert store.dead_bytes() == 0
+    assert store.load_week('2025-03-04')['summary'] == 'new'
+    reopened = WeekArchive(path)
+    assert reopened.list_weeks() == [('2025-03-03', '2025-03-09')]
+    assert [week['summary'] for week in reopened.iter_weeks()] == ['new']
+
+def test_pack_without_a_file(path):
+    store = WeekArchive(path)
+    store.pack()
+    assert not os.path.exists(path)
+    assert store.dead_bytes() == 0
+
+def test_interrupted_append_keeps_previous_archive(path, monkeypatch):
+    store = WeekArchive(path)
+    store.add_weeks([make_week('2025-03-03', '2025-03-09', 'kept')])
+    def fail(fd):
+        raise OSError("disk full")
+    monkeypatch.setattr(archive.os, 'fsync', fail)
+    with pytest.raises(OSError):
+        store.add_weeks([make_week('2025-03-10', '2025-03-16', 'lost')])
+    monkeypatch.undo()
+    reopened = WeekArchive(path)
+    assert reopened.list_weeks() == [('2025-03-03', '2025-03-09')]
+    assert reopened.load_week('2025-03-04')['summary'] == 'kept'
+
+def test_trailing_garbage_is_ignored(path):
+    WeekArchive(path).add_weeks([make_week('2025-03-03', '2025-03-09', 'kept')])
+    with open(path, 'ab') as f:
+        f.write(b'\x00garbage' * 10)
+    store = WeekArchive(path)
+    assert store.load_week('2025-03-04')['summary'] == 'kept'
+    store.add_weeks([make_week('2025-03-10', '2025-03-16', 'added')])
+    assert [week['summary'] for week in WeekArchive(path).iter_weeks()] == ['kept', 'added']
+
+def test_damage_is_reported_never_returned(path):
+    # Any single damaged byte either leaves the weeks readable or raises
+    # ArchiveError; damaged data is never handed back
+    weeks = [make_week('2025-03-03', '2025-03-09', 'a'), make_week('2025-03-10', '2025-03-16', 'b')]
+    WeekArchive(path).add_weeks(weeks)
+    with open(path, 'rb') as f:
+        good = f.read()
+    errors = 0
+    for position in range(len(good)):
+        damaged = bytearray(good)
+        damaged[position] ^= 0xFF
+        with open(path, 'wb') as f:
+            f.write(damaged)
+        try:
+            store = WeekArchive(path)
+            try:
+                assert [store.load_week(*week['date_range']) for week in weeks] == weeks
+            finally:
+                store.close()
+        except ArchiveError:
+            errors += 1
+    assert errors > len(good) // 2
+
+def test_get_archive_reopens_after_outside_pack(path, monkeypatch):
+    monkeypatch.setattr(archive, 'archive_file', path)
+    monkeypatch.setattr(archive, '_archive', None)
+    assert archive.get_archive() is None
+    WeekArchive(path).add_weeks([make_week('2025-03-03', '2025-03-09', 'old')])
+    first = archive.get_archive()
+    assert first.load_week('2025-03-04')['summary'] == 'old'
+    # `python -m data.archive pack` in another process replaces the file
+    other = WeekArchive(path)
+    other.add_weeks([make_week('2025-03-03', '2025-03-09', 'new')])
+    other.pack()
+    current = archive.get_archive()
+    assert current is not first
+    assert current.load_week('2025-03-04')['summary'] == 'new'
+    assert archive.get_archive() is current
+    current.close()
@@ -0,0 +1,84 @@
+import pytest
+from data.fields import compile_expression, evaluate, format_value, parse_value, report_columns, week_table
+
+@pytest.mark.parametrize('field_type, text, value', [
+    ('int', '12', 12),
+    ('int', '1,250', 1250),
+    ('int', '12.5', 12.5),
+    ('float', '12.345', 12.345),
+    ('time', '9:05', 545),
+    ('time', '2:30 pm', 870),
+    ('time', '12am', 0),
+    ('duration', '1:30', 90),
+    ('duration', '-1:30', -90),
+    ('duration', '-0:30', -30),
+    ('duration', '1h 15m', 75),
+    ('duration', '-2h', -120),
+    ('duration', '1.5', 90),
+])
+def test_parse_value(field_type, text, value):
+    assert parse_value(field_type, text) == value
+
+@pytest.mark.parametrize('field_type, text', [
+    ('int', 'n/a'),
+    ('time', '25:00'),
+    ('duration', 'later'),
+    ('text', '42'),
+    ('int', ''),
+])
+def test_unparsable_text_is_kept(field_type, text):
+    assert parse_value(field_type, text) == text
+
+@pytest.mark.parametrize('field_type, value', [
+    ('int', 1250),
+    ('float', 12.345),
+    ('float', 0.1),
+    ('float', 1e20),
+    ('time', 545),
+    ('duration', 90),
+    ('duration', -90),
+    ('duration', -30),
+])
+def test_editing_round_trip(field_type, value):
+    # Text shown in an editor must parse back to the same value on save
+    text = format_value(field_type, value, editing=True)
+    assert parse_value(field_type, text) == value
+    assert parse_value(field_type, format_value(field_type, parse_value(field_type, text), editing=True)) == value
+
+def test_report_formatting_rounds_floats():
+    assert format_value('float', 12.345) == '12.35'
+    assert format_value('float', 3.0) == '3'
+    assert format_value('int', 1250) == '1,250'
+    assert format_value('time', 545) == '09:05'
+    assert format_value('duration', -90) == '-1:30'
+    assert format_value('int', None) == ''
+
+def test_evaluate_left_to_right():
+    values = {'Start': 100, 'End': 142, 'Rate': 0.5}
+    assert evaluate(compile_expression('End - Start'), values) == 42
+    assert evaluate(compile_expression('End - Start * Rate'), values) == 21
+    assert evaluate(compile_expression('End / 2'), values) == 71
+
+def test_evaluate_missing_or_bad_operands():
+    assert evaluate(compile_expression('End - Start'), {'End': 5}) is None
+    assert evaluate(compile_expression('End - Start'), {'End': 5, 'Start': 'n/a'}) is None
+    assert evaluate(compile_expression('End / Start'), {'End': 5, 'Start': 0}) is None
+
+def test_subfield_names_may_contain_hyphens():
+    assert compile_expression('Check-out - Check-in') == (('+', 'Check-out'), ('-', 'Check-in'))
+
+def test_week_table_computed_columns_and_totals():
+    settings = {
+        'subfield_types': {'Start': 'int', 'End': 'int', 'In': 'time', 'Out': 'time'},
+        'computed_columns': [{'name': 'Miles', 'expr': 'End - Start'}, {'name': 'Time', 'expr': 'Out - In'}],
+    }
+    columns = report_columns(settings, ['Start', 'End', 'In', 'Out'])
+    assert [(c.name, c.type) for c in columns][-2:] == [('Miles', 'int'), ('Time', 'duration')]
+    week = {
+        'Monday 2026-10-12': {'additional': {'Start': '100', 'End': '130', 'In': '8:00', 'Out': '9:30'}},
+        'Tuesday 2026-10-13': {'additional': {'Start': '130', 'End': 'n/a', 'In': '8:00', 'Out': '7:45'}},
+    }
+    rows, totals = week_table(week, columns, ('Miles', 'Time'))
+    assert [row[-2:] for row in rows] == [[30, 90], [None, -15]]
+    assert totals[-2:] == [30, 75]
+    assert totals[:4] == [None] * 4
@@ -0,0 +1,89 @@
+import os
+import pytest
+
+pytest.importorskip('PySide6')
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtWidgets import QApplication
+from data import storage
+
+@pytest.fixture
+def window_factory(isolated_storage):
+    app = QApplication.instance() or QApplication([])
+    from main import MainWindow
+    windows = []
+    def make():
+        window = MainWindow()
+        windows.append(window)
+        return window
+    yield make
+    storage.flush()
+    for window in windows:
+        window.autosave_timer.stop()
+        window.deleteLater()
+    app.processEvents()
+
+def restart():
+    # A new process reads the file again
+    storage.flush()
+    storage._cache.update(key=None, data=None, pending=False)
+
+def change_settings(window, **changes):
+    # The storage side of MainWindow.open_settings
+    window.autosave()
+    data = storage.load_data()
+    data['settings'] = dict(window.settings, **changes)
+    storage.save_data(data)
+    old_settings = window.settings
+    window.settings = data['settings']
+    window.apply_settings(old_settings)
+
+def test_notes_survive_a_range_change(window_factory):
+    window = window_factory()
+    days = window.day_model.days()
+    for day in days[:3]:
+        window.day_model.set_general(day, f"notes for {day}")
+    window.autosave()
+    change_settings(window, report_range='Two Weeks')
+    assert set(days) <= set(window.day_model.days())
+    window.day_model.set_general(days[3], "typed after the change")
+    window.autosave()
+    restart()
+    reopened = window_factory()
+    assert reopened.get_date_range() == window.get_date_range()
+    assert [reopened.day_model.general(day) for day in days[:4]] == [
+        f"notes for {day}" for day in days[:3]] + ["typed after the change"]
+
+def test_failed_save_is_shown(window_factory, monkeypatch):
+    import main
+    shown = []
+    monkeypatch.setattr(main.QMessageBox, 'warning', lambda parent, title, text: shown.append(title))
+    monkeypatch.setattr(main.QMessageBox, 'information', lambda parent, title, text: shown.append(title))
+    original = storage._atomic_write
+    disk = {'full': True}
+    def write(path, payload):
+        if disk['full']:
+            raise OSError(28, "No space left on device")
+        original(path, payload)
+    monkeypatch.setattr(storage, '_atomic_write', write)
+    window = window_factory()
+    window.day_model.set_general(window.day_model.days()[0], "notes")
+    window.save_all_data()
+    assert shown == ["Save Failed"]
+    QApplication.processEvents()
+    assert "No space left" in window.statusBar().currentMessage()
+    disk['full'] = False
+    window.save_all_data()
+    assert shown == ["Save Failed", "Saved"]
+
+def test_search_preview_escapes_around_matches(window_factory):
+    from PySide6.QtCore import Qt
+    from PySide6.QtWidgets import QTreeWidgetItem
+    from main import SearchDialog
+    dialog = SearchDialog(window_factory())
+    item = QTreeWidgetItem(["2026-10-12", "Monday"])
+    item.setData(0, Qt.UserRole, {'text': 'R&D "amp" <b> amplifier', 'matched': ['amp*', 'quot', 'lt'], 'location': 'Monday 2026-10-12'})
+    dialog.show_hit(item)
+    assert dialog.preview.toPlainText().endswith('R&D "amp" <b> amplifier')
+    html = dialog.preview.toHtml()
+    assert html.count('font-weight') >= 2
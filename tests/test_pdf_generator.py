@@ -0,0 +1,59 @@
+import time
+import threading
+import pytest
+
+pytest.importorskip('reportlab')
+
+from reports import pdf_generator
+from reports.report_data import collect_report
+
+def sample_report(note="notes"):
+    days = {f'Monday 2026-10-{12 + i:02d}': {'general': f"{note} {i}", 'additional': {}} for i in range(3)}
+    return collect_report({'name': 'Sam', 'agency': 'North'}, days, "summary", 'Monday–Friday', '2026-10-12', '2026-10-16')
+
+def test_renders_do_not_overlap(tmp_path, monkeypatch):
+    render = pdf_generator.ReportTemplate.render
+    state = {'active': 0, 'most': 0}
+    lock = threading.Lock()
+    def tracked(self, *args, **kwargs):
+        with lock:
+            state['active'] += 1
+            state['most'] = max(state['most'], state['active'])
+        try:
+            time.sleep(0.02)
+            return render(self, *args, **kwargs)
+        finally:
+            with lock:
+                state['active'] -= 1
+    monkeypatch.setattr(pdf_generator.ReportTemplate, 'render', tracked)
+    paths = [str(tmp_path / f"report{i}.pdf") for i in range(4)]
+    threads = [threading.Thread(target=pdf_generator.write_pdf_report, args=(path, sample_report(path)),
+                                kwargs={'use_cache': False}) for path in paths]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert state['most'] == 1
+    for path in paths:
+        with open(path, 'rb') as f:
+            assert f.read(5) == b'%PDF-'
+
+def saved_week(day, logo):
+    return {'date_range': [day, day], 'settings': {'name': 'Sam', 'logo': logo}, 'report_range': 'Monday–Friday',
+            'summary': '', f'Monday {day}': {'general': 'notes', 'additional': {}}}
+
+def test_rollup_embeds_the_logo_once_per_document(tmp_path, monkeypatch):
+    Image = pytest.importorskip('PIL.Image')
+    from reports import logo_cache
+    monkeypatch.setattr(logo_cache, 'cache_dir', str(tmp_path / 'logos'))
+    logo = str(tmp_path / 'logo.png')
+    Image.new('RGB', (400, 200), (200, 30, 30)).save(logo)
+    weeks = [saved_week(day, logo) for day in ('2026-09-07', '2026-09-14', '2026-09-21')]
+    for _ in range(2):
+        # A second document defines its own form rather than reusing the first one's
+        path = str(tmp_path / 'rollup.pdf')
+        assert pdf_generator.generate_rollup_report(path, weeks) == 3
+        with open(path, 'rb') as f:
+            data = f.read()
+        assert data.count(b'/Subtype /Image') == 1
+        assert data.count(b'/Subtype /Form') == 1
@@ -0,0 +1,23 @@
+import pytest
+from reports.rollup import main, month_bounds, quarter_bounds
+
+def test_bounds():
+    assert month_bounds('2026-02') == ('2026-02-01', '2026-02-28')
+    assert month_bounds('2026-12') == ('2026-12-01', '2026-12-31')
+    assert quarter_bounds('2026q3') == ('2026-07-01', '2026-09-30')
+
+@pytest.mark.parametrize('args', [
+    ['--quarter', '2026Q5'],
+    ['--quarter', '2026Q0'],
+    ['--quarter', '2026'],
+    ['--month', '2026-13'],
+    ['--month', 'sept'],
+    ['--from', '2026-02-30'],
+    ['--from', '2026-01-01', '--to', 'yesterday'],
+])
+def test_bad_periods_are_usage_errors(args, capsys):
+    with pytest.raises(SystemExit) as exit:
+        main(args + ['-o', 'unused.pdf'])
+    assert exit.value.code == 2
+    err = capsys.readouterr().err
+    assert err.startswith('usage:') and 'expected' in err
@@ -0,0 +1,19 @@
+from data.search import match_spans, parse_query, tokenize
+
+def words(text, query):
+    return [text[start:end] for start, end in match_spans(text, parse_query(query))]
+
+def test_exact_terms_match_whole_words():
+    assert words("Radio check, radios fine", "radio") == ["Radio"]
+
+def test_prefix_terms():
+    assert words("Radio check, radios fine", "radio*") == ["Radio", "radios"]
+
+def test_html_significant_text_is_not_matched_as_entities():
+    text = 'R&D says "amp" < 5 & lt'
+    assert words(text, "amp* lt quot") == ["amp", "lt"]
+    assert words(text, "d") == ["D"]
+
+def test_spans_follow_the_index_tokens():
+    text = "Check-in at Straße 5"
+    assert [word.casefold() for word in words(text, "check in at straße 5")] == tokenize(text)
@@ -0,0 +1,73 @@
+import gzip
+import json
+import threading
+import http.client
+import pytest
+from server import app
+from server.app import BodyTooLarge, gunzip, make_server
+from server.team_store import TeamStore
+
+def week(name='Sam'):
+    return {'date_range': ['2026-10-12', '2026-10-16'], 'settings': {'name': name, 'logo': '/home/sam/logo.png'},
+            'summary': '', 'Monday 2026-10-12': {'general': 'first', 'additional': {}}}
+
+def test_gunzip_round_trip():
+    body = json.dumps({'weeks': []}).encode('utf-8')
+    assert gunzip(gzip.compress(body)) == body
+
+def test_gunzip_stops_at_the_limit():
+    bomb = gzip.compress(b'\0' * (8 * 1024 * 1024))
+    assert len(bomb) < 64 * 1024
+    with pytest.raises(BodyTooLarge):
+        gunzip(bomb, limit=1024 * 1024)
+
+@pytest.mark.parametrize('payload', [b'not gzip at all', gzip.compress(b'{"a": 1}')[:-12]])
+def test_gunzip_rejects_bad_bodies(payload):
+    with pytest.raises(ValueError):
+        gunzip(payload)
+
+@pytest.fixture
+def server(tmp_path):
+    server = make_server(str(tmp_path / 'team.db'), port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.store.close()
+
+def post(server, path, body, headers):
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+    conn.request('POST', path, body, dict(headers, **{'Content-Length': str(len(body))}))
+    response = conn.getresponse()
+    result = response.status, json.loads(response.read())
+    conn.close()
+    return result
+
+def test_gzip_bomb_is_refused(server, monkeypatch):
+    monkeypatch.setattr(app, 'max_body', 1024 * 1024)
+    bomb = gzip.compress(b' ' * (8 * 1024 * 1024))
+    status, body = post(server, '/api/sync', bomb, {'Content-Encoding': 'gzip'})
+    assert status == 413
+    status, body = post(server, '/api/weeks', gzip.compress(json.dumps(week()).encode('utf-8')), {'Content-Encoding': 'gzip'})
+    assert status == 201
+
+def test_concurrent_deltas_for_one_week_all_apply(tmp_path):
+    store = TeamStore(str(tmp_path / 'team.db'))
+    store.submit(week())
+    days = [f'Day {i:02d}' for i in range(16)]
+    barrier = threading.Barrier(len(days))
+    def send(day):
+        barrier.wait()
+        assert store.apply_delta('Sam', {'date_range': ['2026-10-12', '2026-10-16'],
+                                         'days': {day: {'general': day, 'additional': {}}}}) == 'ok'
+    threads = [threading.Thread(target=send, args=(day,)) for day in days]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stored = store.load_week('Sam', '2026-10-12', '2026-10-16')
+    assert [day for day in days if day in stored] == days
+    assert stored['Monday 2026-10-12']['general'] == 'first'
+    assert stored['settings'] == {'name': 'Sam'}
+    store.close()
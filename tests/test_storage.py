@@ -0,0 +1,49 @@
+import errno
+import pytest
+from data import storage
+
+def week(note):
+    return {'date_range': ['2026-10-12', '2026-10-16'], 'settings': {}, 'Monday 2026-10-12': {'general': note, 'additional': {}}}
+
+@pytest.fixture
+def disk_full(monkeypatch):
+    original = storage._atomic_write
+    state = {'full': True}
+    def write(path, payload):
+        if state['full']:
+            raise OSError(errno.ENOSPC, "No space left on device")
+        original(path, payload)
+    monkeypatch.setattr(storage, '_atomic_write', write)
+    return state
+
+def test_failed_write_is_reported_not_raised(isolated_storage, disk_full):
+    messages = []
+    storage.set_error_handler(messages.append)
+    storage.save_data(week('unsaved'))
+    assert storage.flush()
+    assert isinstance(storage.save_error(), OSError)
+    assert len(messages) == 1 and 'No space left' in messages[0]
+    # Unrelated reads neither raise the old error nor lose the unsaved week
+    assert storage.search_history('anything') == []
+    assert storage.load_week('2026-10-12') is None
+    assert storage.load_data()['Monday 2026-10-12']['general'] == 'unsaved'
+
+def test_later_write_clears_the_error(isolated_storage, disk_full):
+    storage.set_error_handler(lambda message: None)
+    storage.save_data(week('first'))
+    storage.flush()
+    disk_full['full'] = False
+    storage.save_data(week('second'))
+    storage.flush()
+    assert storage.save_error() is None
+    storage._cache.update(key=None, data=None, pending=False)
+    assert storage.load_data()['Monday 2026-10-12']['general'] == 'second'
+    assert storage.load_week('2026-10-12')['Monday 2026-10-12']['general'] == 'second'
+
+def test_clear_discards_the_error(isolated_storage, disk_full):
+    storage.set_error_handler(lambda message: None)
+    storage.save_data(week('unsaved'))
+    storage.flush()
+    storage.clear_data()
+    assert storage.save_error() is None
+    assert storage.load_data() == {}
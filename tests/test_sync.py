@@ -0,0 +1,69 @@
+import time
+import socket
+import asyncio
+import threading
+import pytest
+from data import sync
+
+@pytest.fixture
+def hangup_server():
+    # Accepts connections and closes them without a reply
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen()
+    accepted = []
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            accepted.append(conn)
+            conn.recv(65536)
+            conn.close()
+    threading.Thread(target=serve, daemon=True).start()
+    yield f"http://127.0.0.1:{listener.getsockname()[1]}", accepted
+    listener.close()
+
+def reply_server(reply):
+    async def handle(reader, writer):
+        await reader.read(1)
+        writer.write(reply)
+        await writer.drain()
+        writer.close()
+    return asyncio.start_server(handle, '127.0.0.1', 0)
+
+def test_closed_without_reply(hangup_server):
+    url, _ = hangup_server
+    with pytest.raises(ConnectionError):
+        asyncio.run(sync.post_json(url, '/sync', {}, timeout=5))
+
+@pytest.mark.parametrize('reply', [b'garbage\r\n\r\n', b'HTTP/1.1\r\n\r\n', b'HTTP/1.1 OK 200\r\n\r\n'])
+def test_malformed_status_line(reply):
+    async def run():
+        server = await reply_server(reply)
+        async with server:
+            port = server.sockets[0].getsockname()[1]
+            return await sync.post_json(f"http://127.0.0.1:{port}", '/sync', {}, timeout=5)
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+
+def test_client_keeps_retrying_after_hangup(hangup_server, tmp_path, monkeypatch):
+    url, accepted = hangup_server
+    monkeypatch.setattr(sync, 'min_backoff', 0.05)
+    monkeypatch.setattr(sync, 'max_backoff', 0.05)
+    outbox = sync.Outbox(str(tmp_path / 'sync.db'))
+    client = sync.SyncClient(url, 'token', outbox)
+    client.enqueue({'date_range': ['2026-10-12', '2026-10-16'], 'settings': {'name': 'Sam'},
+                    'Monday 2026-10-12': {'general': 'notes', 'additional': {}}})
+    client.start()
+    try:
+        deadline = time.monotonic() + 5
+        while len(accepted) < 3 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert len(accepted) >= 3
+        assert client.running()
+        assert client.last_error.startswith('ConnectionError')
+        assert outbox.count() == 1
+    finally:
+        client.stop()
@@ -0,0 +1,336 @@
+from PySide6.QtWidgets import (
+    QAbstractScrollArea, QApplication, QGroupBox, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QTextEdit, QWidget
+)
+from collections import namedtuple
+from types import MappingProxyType
+from PySide6.QtCore import QObject, Signal
+from data.fields import format_value, parse_value
+
+class DaySnapshot(namedtuple('DaySnapshot', 'general additional')):
+    # Immutable, slotted view of one day as saved and reported. `additional`
+    # is a read-only mapping of subfield -> native value. get() lets it stand
+    # in for the day dicts the report code reads.
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def as_dict(self):
+        return {'general': self.general, 'additional': dict(self.additional)}
+
+class DayListModel(QObject):
+    # Text of every day in the reporting range. The editors in DayListView
+    # only exist for visible days, so this is the source of truth. Alongside
+    # the editable text it keeps a DaySnapshot per day, replaced whenever that
+    # day changes, so saving and reporting never walk the editors.
+    fieldChanged = Signal(str, str)   # day, 'general' or subfield name
+    dataReset = Signal()              # values replaced (load/clear)
+    layoutChanged = Signal()          # days or subfields changed
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._days = []
+        self._data = {}
+        self._snapshots = {}
+        self.additional_field = ''
+        self.subfields = []
+        self.subfield_types = {}
+
+    def days(self):
+        return list(self._days)
+
+    def day_count(self):
+        return len(self._days)
+
+    def day_at(self, row):
+        return self._days[row]
+
+    def row_of(self, day):
+        return self._days.index(day)
+
+    def _blank(self):
+        return {'general': '', 'additional': {}, 'checked': True}
+
+    def set_days(self, days, stored=None):
+        # Days that remain keep their current text; new days are filled from `stored`
+        days = list(dict.fromkeys(days))
+        stored = stored or {}
+        data = {}
+        for day in days:
+            if day in self._data:
+                data[day] = self._data[day]
+            else:
+                data[day] = self._blank()
+                self._fill(data[day], stored.get(day))
+        self._days = days
+        self._data = data
+        self._snapshots = {day: self._snapshots.get(day) or self._snap(day) for day in days}
+        self.layoutChanged.emit()
+
+    def set_subfields(self, additional_field, subfields, stored=None, types=None):
+        # types: subfield -> field type (data.fields); values are edited as text
+        # and parsed to native values by week_data()
+        stored = stored or {}
+        self.additional_field = additional_field
+        self.subfields = list(subfields) if additional_field else []
+        self.subfield_types = dict(types or {})
+        for day, daydata in self._data.items():
+            stored_additional = (stored.get(day) or {}).get('additional', {})
+            for sub in self.subfields:
+                if sub not in daydata['additional']:
+                    daydata['additional'][sub] = self._display(sub, stored_additional.get(sub, ''))
+        self._snapshots = {day: self._snap(day) for day in self._days}
+        self.layoutChanged.emit()
+
+    def _display(self, subfield, value):
+        return format_value(self.subfield_types.get(subfield, 'text'), value, editing=True) if not isinstance(value, str) else value
+
+    def _fill(self, daydata, stored_day):
+        stored_day = stored_day or {}
+        daydata['general'] = stored_day.get('general', '')
+        daydata['additional'] = {sub: self._display(sub, val) for sub, val in stored_day.get('additional', {}).items()}
+
+    def _snap(self, day):
+        additional = self._data[day]['additional']
+        return DaySnapshot(self._data[day]['general'], MappingProxyType(
+            {sub: parse_value(self.subfield_types.get(sub, 'text'), additional.get(sub, '')) for sub in self.subfields}))
+
+    def load(self, data):
+        for day in self._days:
+            self._fill(self._data[day], data.get(day))
+        self._snapshots = {day: self._snap(day) for day in self._days}
+        self.dataReset.emit()
+
+    def clear(self):
+        for day in self._days:
+            self._data[day] = self._blank()
+        self._snapshots = {day: self._snap(day) for day in self._days}
+        self.dataReset.emit()
+
+    def general(self, day):
+        return self._data[day]['general']
+
+    def additional(self, day, subfield):
+        return self._data[day]['additional'].get(subfield, '')
+
+    def checked(self, day):
+        return self._data[day]['checked']
+
+    def set_general(self, day, text):
+        self._data[day]['general'] = text
+        self._snapshots[day] = self._snapshots[day]._replace(general=text)
+        self.fieldChanged.emit(day, 'general')
+
+    def set_additional(self, day, subfield, text):
+        self._data[day]['additional'][subfield] = text
+        if subfield in self.subfields:
+            # Only the edited value is parsed
+            additional = dict(self._snapshots[day].additional)
+            additional[subfield] = parse_value(self.subfield_types.get(subfield, 'text'), text)
+            self._snapshots[day] = self._snapshots[day]._replace(additional=MappingProxyType(additional))
+        self.fieldChanged.emit(day, subfield)
+
+    def set_checked(self, day, checked):
+        self._data[day]['checked'] = checked
+
+    def typed_additional(self, day, subfield):
+        return self._snapshots[day].additional.get(subfield, '')
+
+    def snapshot(self):
+        # Read-only day -> DaySnapshot mapping in day order; cheap to take
+        return MappingProxyType({day: self._snapshots[day] for day in self._days})
+
+    def week_data(self):
+        # Plain dicts for saving; subfield values are in native form (see data.fields)
+        return {day: self._snapshots[day].as_dict() for day in self._days}
+
+class DayEditor(QGroupBox):
+    # One recyclable day panel; DayListView binds it to whichever day is visible
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.day = None
+        self.binding = False
+        self.setCheckable(True)
+        self.setChecked(True)
+        self.toggled.connect(self.on_toggled)
+        layout = QVBoxLayout()
+        self.general_input = QTextEdit()
+        self.general_input.setPlaceholderText("General notes...")
+        self.general_input.setTabChangesFocus(True)
+        self.general_input.setFixedHeight(110)
+        self.general_input.textChanged.connect(self.on_general_changed)
+        layout.addWidget(self.general_input)
+        self.additional_label = QLabel(model.additional_field)
+        self.additional_label.setStyleSheet("font-weight: bold; margin-top: 8px;")
+        self.additional_label.setVisible(bool(model.additional_field))
+        layout.addWidget(self.additional_label)
+        self.subfield_inputs = []
+        for subfield in model.subfields:
+            subfield_layout = QHBoxLayout()
+            subfield_label = QLabel(subfield+":")
+            subfield_input = QLineEdit()
+            subfield_input.setPlaceholderText(subfield)
+            subfield_input.textChanged.connect(lambda text, subfield=subfield: self.on_subfield_changed(subfield, text))
+            subfield_layout.addWidget(subfield_label)
+            subfield_layout.addWidget(subfield_input)
+            layout.addLayout(subfield_layout)
+            self.subfield_inputs.append((subfield, subfield_input))
+        self.setLayout(layout)
+
+    def bind(self, day):
+        self.binding = True
+        try:
+            rebound = day != self.day
+            self.day = day
+            self.setTitle(day)
+            self.setChecked(self.model.checked(day))
+            # A recycled editor must not carry the previous day's undo
+            # history, even when both days have the same text
+            if rebound or self.general_input.toPlainText() != self.model.general(day):
+                self.general_input.setPlainText(self.model.general(day))
+            for subfield, subfield_input in self.subfield_inputs:
+                subfield_input.setText(self.model.additional(day, subfield))
+        finally:
+            self.binding = False
+
+    def focus_fields(self):
+        return [self.general_input] + [subfield_input for _, subfield_input in self.subfield_inputs]
+
+    def on_toggled(self, checked):
+        if not self.binding and self.day is not None:
+            self.model.set_checked(self.day, checked)
+
+    def on_general_changed(self):
+        if not self.binding and self.day is not None:
+            self.model.set_general(self.day, self.general_input.toPlainText())
+
+    def on_subfield_changed(self, subfield, text):
+        if not self.binding and self.day is not None:
+            self.model.set_additional(self.day, subfield, text)
+
+class DayListView(QAbstractScrollArea):
+    # Scrolling list of day panels that only creates editors for the rows in
+    # view and recycles them as rows scroll in and out, so startup time and
+    # memory do not grow with the length of the reporting range.
+    spacing = 8
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.bound = {}
+        self.free = []
+        self.row_height = 0
+        self.config = None
+        self.verticalScrollBar().setSingleStep(24)
+        model.layoutChanged.connect(self.rebuild)
+        model.dataReset.connect(self.rebind)
+        self.rebuild()
+
+    def new_editor(self):
+        editor = DayEditor(self.model, self.viewport())
+        editor.hide()
+        return editor
+
+    def rebuild(self):
+        # Editors are only recreated when the subfields change; otherwise days
+        # that stay in view keep their editor (and its undo history)
+        config = (self.model.additional_field, tuple(self.model.subfields))
+        if self.row_height and config == self.config:
+            self.update_scrollbar()
+            self.layout_rows()
+            return
+        self.config = config
+        for editor in list(self.bound.values()) + self.free:
+            editor.deleteLater()
+        self.bound = {}
+        self.free = [self.new_editor()]
+        self.row_height = self.free[0].sizeHint().height() + self.spacing
+        self.update_scrollbar()
+        self.layout_rows()
+
+    def rebind(self):
+        for day, editor in self.bound.items():
+            editor.bind(day)
+
+    def update_scrollbar(self):
+        total = self.model.day_count() * self.row_height
+        bar = self.verticalScrollBar()
+        bar.setPageStep(self.viewport().height())
+        bar.setRange(0, max(0, total - self.viewport().height()))
+
+    def visible_rows(self):
+        count = self.model.day_count()
+        if not count or not self.row_height:
+            return range(0)
+        top = self.verticalScrollBar().value()
+        first = top // self.row_height
+        last = min(count - 1, (top + self.viewport().height()) // self.row_height)
+        return range(first, last + 1)
+
+    def layout_rows(self):
+        rows = self.visible_rows()
+        visible_days = {self.model.day_at(row): row for row in rows}
+        for day in [d for d in self.bound if d not in visible_days]:
+            editor = self.bound.pop(day)
+            editor.hide()
+            self.free.append(editor)
+        top = self.verticalScrollBar().value()
+        width = self.viewport().width()
+        for day, row in visible_days.items():
+            editor = self.bound.get(day)
+            if editor is None:
+                editor = self.free.pop() if self.free else self.new_editor()
+                editor.bind(day)
+                self.bound[day] = editor
+            editor.setGeometry(0, row * self.row_height - top, width, self.row_height - self.spacing)
+            editor.show()
+        # Keep Tab order in row order among the editors in view
+        ordered = [self.bound[self.model.day_at(row)] for row in rows]
+        for before, after in zip(ordered, ordered[1:]):
+            QWidget.setTabOrder(before.focus_fields()[-1], after.general_input)
+
+    def editor_for(self, day):
+        return self.bound.get(day)
+
+    def scroll_to_day(self, day):
+        row = self.model.row_of(day)
+        bar = self.verticalScrollBar()
+        top = row * self.row_height
+        if top < bar.value():
+            bar.setValue(top)
+        elif top + self.row_height > bar.value() + self.viewport().height():
+            bar.setValue(top + self.row_height - self.viewport().height())
+        self.layout_rows()
+
+    def focusNextPrevChild(self, next):
+        # Tab/Shift+Tab walks every day's fields, scrolling hidden days into view
+        focus = QApplication.focusWidget()
+        editor = None
+        for candidate in self.bound.values():
+            if focus is not None and (focus is candidate or candidate.isAncestorOf(focus)):
+                editor = candidate
+        if editor is None:
+            return super().focusNextPrevChild(next)
+        fields = editor.focus_fields()
+        index = fields.index(focus) if focus in fields else -1
+        index += 1 if next else -1
+        if 0 <= index < len(fields):
+            fields[index].setFocus()
+            return True
+        row = self.model.row_of(editor.day) + (1 if next else -1)
+        if not 0 <= row < self.model.day_count():
+            return super().focusNextPrevChild(next)
+        day = self.model.day_at(row)
+        self.scroll_to_day(day)
+        target = self.bound[day].focus_fields()
+        (target[0] if next else target[-1]).setFocus()
+        return True
+
+    def scrollContentsBy(self, dx, dy):
+        self.layout_rows()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbar()
+        self.layout_rows()
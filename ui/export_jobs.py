@@ -0,0 +1,124 @@
+import threading
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, QTimer
+from PySide6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QLabel, QProgressBar, QPushButton
+
+# Background exports. Each export is an ExportJob on a shared QThreadPool, so
+# rendering never blocks the window and several exports can run at once. The
+# panel shows one row per running job with its progress and a Cancel button.
+
+class JobCancelled(Exception):
+    pass
+
+class JobSignals(QObject):
+    progress = Signal(str)
+    finished = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+class ExportJob(QRunnable):
+    # Runs work(progress) on a pool thread. work calls progress(text) as it
+    # goes; once cancel() has been called that call raises JobCancelled, which
+    # stops the job before anything is written.
+    def __init__(self, title, work):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.title = title
+        self.work = work
+        self.signals = JobSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def progress(self, text):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.signals.progress.emit(text)
+
+    def run(self):
+        try:
+            self.progress("Starting")
+            result = self.work(self.progress)
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(f"{type(e).__name__}: {e}")
+        else:
+            self.signals.finished.emit(result)
+
+class JobRow(QWidget):
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.title_label = QLabel(job.title)
+        self.status_label = QLabel("Queued")
+        self.bar = QProgressBar()
+        self.bar.setRange(0, 0)  # busy indicator; page counts are not known up front
+        self.bar.setMaximumHeight(12)
+        self.bar.setTextVisible(False)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(job.cancel)
+        self.cancel_button.clicked.connect(lambda: self.status_label.setText("Cancelling…"))
+        layout.addWidget(self.title_label)
+        layout.addWidget(self.bar, 1)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.cancel_button)
+        self.setLayout(layout)
+
+class ExportJobsPanel(QWidget):
+    # Hidden while idle. start() queues a job; on_done(result) runs on the GUI
+    # thread when it succeeds, on_error(message) when it fails. PDF layouts
+    # still run one at a time (reports.pdf_generator.render_lock); other jobs
+    # run alongside them.
+    max_jobs = 4
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(self.max_jobs)
+        self.jobs = {}
+        self.rows_layout = QVBoxLayout()
+        self.rows_layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(self.rows_layout)
+        self.hide()
+
+    def start(self, title, work, on_done=None, on_error=None):
+        job = ExportJob(title, work)
+        row = JobRow(job, self)
+        self.rows_layout.addWidget(row)
+        self.jobs[job] = row
+        job.signals.progress.connect(row.status_label.setText)
+        job.signals.finished.connect(lambda result: self._done(job, "Done", on_done, result))
+        job.signals.failed.connect(lambda message: self._done(job, "Failed", on_error, message))
+        job.signals.cancelled.connect(lambda: self._done(job, "Cancelled"))
+        self.show()
+        self.pool.start(job)
+        return job
+
+    def _done(self, job, status, callback=None, value=None):
+        row = self.jobs.pop(job)
+        row.status_label.setText(status)
+        row.cancel_button.setEnabled(False)
+        row.bar.setRange(0, 1)
+        row.bar.setValue(1)
+        # Leave the finished row up briefly so the outcome can be seen
+        QTimer.singleShot(3000, lambda: self._remove(row))
+        if callback is not None:
+            callback(value)
+
+    def _remove(self, row):
+        self.rows_layout.removeWidget(row)
+        row.deleteLater()
+        if not self.rows_layout.count():
+            self.hide()
+
+    def running(self):
+        return len(self.jobs)
+
+    def cancel_all(self):
+        for job in list(self.jobs):
+            job.cancel()
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)